@@ -1,8 +1,44 @@
 """Classes: Model for aircraft flights."""
 
+from functools import lru_cache
+from itertools import product
+
 
 class Flight:
-    """A flight with a particular passenger aircraft."""
+    """A flight with a particular passenger aircraft.
+
+    Passengers are held in one flat list with a slot per seat, at index
+    (row - first row) * seats per row + letter offset.
+
+    Free seats are also indexed by row, as a bitmask with bit n set if
+    the seat at letter offset n is free, along with the longest run of
+    adjacent free seats and whether a window seat is free. These are
+    updated on every change of seating, and make searching for free
+    seats a handful of lookups.
+
+    Passengers are indexed by name, mapped to the slots of their seats,
+    for finding a passenger's seat with one lookup. A manifest of
+    (passenger, seat designator) pairs is kept for boarding cards, and
+    sorted only when they are made, so passengers need only be
+    orderable to make boarding cards, as they always did.
+    """
+
+    __slots__ = (
+        "_number",
+        "_aircraft",
+        "_slots",
+        "_designators",
+        "_seating",
+        "_free",
+        "_width",
+        "_runs",
+        "_free_masks",
+        "_longest_runs",
+        "_windows_free",
+        "_seats",
+        "_manifest",
+        "_manifest_sorted",
+    )
 
     def __init__(self, number, aircraft):
         if not number[:2].isalpha():
@@ -19,8 +55,19 @@ class Flight:
         # consumption or manipulation prefixed by "_"
         self._number = number
         self._aircraft = aircraft
-        rows, seats = self._aircraft.seating_plan()
-        self._seating = [None] + [{letter: None for letter in seats} for _ in rows]
+        self._slots = self._aircraft.seat_slots()
+        self._designators = self._aircraft.seat_designators()
+        self._seating = [None] * len(self._designators)
+        self._free = len(self._seating)
+        self._width = len(self._aircraft.seating_plan()[1])
+        self._runs = _run_tables(self._width)
+        rows = len(self._seating) // self._width
+        self._free_masks = [(1 << self._width) - 1] * rows
+        self._longest_runs = bytearray([self._width]) * rows
+        self._windows_free = bytearray([1]) * rows
+        self._seats = {}
+        self._manifest = []
+        self._manifest_sorted = True
 
     def aircraft_model(self):
         # Method which returns aircraft model by delegating to
@@ -39,19 +86,213 @@ class Flight:
 
         Args:
             seat: A seat designator such as '12C' or '21F'.
-            passenger: The passenger name.
+            passenger: The passenger name. None leaves the seat free.
 
         Raises:
             ValueError: If the seat is unavailable
+            TypeError: If the passenger is not hashable.
         """
-        row, letter = self._parse_seat(seat)
+        slot = self._parse_seat(seat)
 
-        if self._seating[row][letter] is not None:
+        if self._seating[slot] is not None:
             raise ValueError(f"Seat {seat} already occupied")
 
-        self._seating[row][letter] = passenger
+        if passenger is None:
+            return  # Nobody to seat, as a None slot is a free seat
+
+        self._seats.setdefault(passenger, []).append(slot)
+        self._add_to_manifest(passenger, slot)
+        self._seating[slot] = passenger
+        self._free -= 1
+        self._index_seat(slot, False)
+
+    def allocate_seats(self, assignments):
+        """Allocate seats to passengers, either all of them or none.
+
+        Args:
+            assignments: An iterable series of (seat, passenger) pairs,
+                with seat designators such as '12C' or '21F'. Seats
+                assigned to None are left free.
+
+        Raises:
+            ValueError: If any seat is invalid, unavailable or assigned
+                more than once, in which case no seat is allocated.
+            TypeError: If any passenger is not hashable, in which case
+                no seat is allocated.
+        """
+        assignments = list(assignments)
+        lookup = self._slots.get
+        slots = [lookup(seat) for seat, _ in assignments]
+        if None in slots:
+            slots = [self._parse_seat(seat) for seat, _ in assignments]
+
+        seating = self._seating
+        occupants = [seating[slot] for slot in slots]
+        if len(set(slots)) != len(slots) or occupants.count(None) != len(slots):
+            seen = set()
+            for (seat, _), slot in zip(assignments, slots):
+                if seating[slot] is not None:
+                    raise ValueError(f"Seat {seat} already occupied")
+                if slot in seen:
+                    raise ValueError(f"Seat {seat} assigned more than once")
+                seen.add(slot)
+
+        for _, passenger in assignments:
+            hash(passenger)  # Fails before any change if unhashable
+
+        seats = self._seats
+        add_to_manifest = self._add_to_manifest
+        index_seat = self._index_seat
+        for (_, passenger), slot in zip(assignments, slots):
+            if passenger is None:
+                continue
+            seats.setdefault(passenger, []).append(slot)
+            add_to_manifest(passenger, slot)
+            seating[slot] = passenger
+            index_seat(slot, False)
+            self._free -= 1
+
+    def auto_allocate_seats(self, passengers, preference="", together=False):
+        """Allocate free seats to passengers, either all of them or none.
+
+        Args:
+            passengers: A sequence of passenger names.
+            preference: Seat letters to fill first, in order of
+                preference, such as 'AK' for window seats on a
+                Boeing 777. Other letters follow in seating plan order.
+                Seats of one letter are filled from the front row back.
+            together: If True, seat the passengers in adjacent seats in
+                one row, in the first row with room for all of them.
+                Aisles are not accounted for.
+
+        Returns:
+            A list of the (seat, passenger) pairs allocated.
+
+        Raises:
+            ValueError: If there are not enough suitable free seats, in
+                which case no seat is allocated.
+        """
+        seat_letters = self._aircraft.seating_plan()[1]
+        width = len(seat_letters)
+        if together:
+            slots = self._adjacent_free_slots(len(passengers))
+        else:
+            if len(passengers) > self._free:
+                raise ValueError(
+                    f"Only {self._free} seats free for {len(passengers)} passengers"
+                )
+            for letter in preference:
+                if letter not in seat_letters:
+                    raise ValueError(f"Invalid seat letter {letter}")
+            order = list(dict.fromkeys(preference + seat_letters))
+            seating = self._seating
+            slots = [
+                slot
+                for letter in order
+                for slot in range(seat_letters.index(letter), len(seating), width)
+                if seating[slot] is None
+            ][: len(passengers)]
+
+        assignments = [
+            (self._designators[slot], passenger)
+            for slot, passenger in zip(slots, passengers)
+        ]
+        self.allocate_seats(assignments)
+        return assignments
+
+    def _adjacent_free_slots(self, count, best=False):
+        """The slots of a block of count adjacent free seats in a row.
+
+        Args:
+            count: The number of seats.
+            best: If True, take the block from the row whose longest run
+                of free seats is shortest but fits, otherwise the first
+                block in seating order.
+
+        Raises:
+            ValueError: If there is no such block.
+        """
+        if count < 0:
+            raise ValueError(f"Invalid number of seats {count}")
+        if count == 0:
+            return []
+        longest_runs = self._longest_runs
+        rows = [longest_runs.find(run) for run in range(count, self._width + 1)]
+        rows = [row for row in rows if row >= 0]
+        if not rows:
+            raise ValueError(f"No block of {count} adjacent free seats in a row")
+        # Rows are found in order of increasing run length
+        row = rows[0] if best else min(rows)
+        offsets = self._runs[2 if best else 1][self._free_masks[row]]
+        first = row * self._width + offsets[count]
+        return list(range(first, first + count))
+
+    def find_adjacent_seats(self, count, best=False):
+        """Find a block of adjacent free seats in one row.
+
+        Aisles are not accounted for.
+
+        Args:
+            count: The number of seats.
+            best: If True, take the block from the row whose longest run
+                of free seats is shortest but fits, and from the shortest
+                run which fits in that row, leaving longer runs for larger
+                groups. Otherwise take the first block in seating order.
+
+        Returns:
+            A list of count seat designators, or None if there is no
+            such block.
+        """
+        try:
+            slots = self._adjacent_free_slots(count, best)
+        except ValueError:
+            return None
+        return [self._designators[slot] for slot in slots]
+
+    def find_window_seat(self):
+        """Find a free window seat, the first in seating order.
+
+        Returns:
+            A seat designator, or None if every window seat is taken.
+        """
+        row = self._windows_free.find(1)
+        if row < 0:
+            return None
+        offset = 0 if self._free_masks[row] & 1 else self._width - 1
+        return self._designators[row * self._width + offset]
+
+    def num_available_in_row(self, row):
+        """The number of free seats in a row.
+
+        Raises:
+            ValueError: If the row number is invalid.
+        """
+        rows = self._aircraft.seating_plan()[0]
+        if row not in rows:
+            raise ValueError(f"Invalid row number {row}")
+        return self._free_masks[rows.index(row)].bit_count()
+
+    def _index_seat(self, slot, free):
+        """Update the free seat index for a seat becoming free or taken."""
+        row, offset = divmod(slot, self._width)
+        if free:
+            mask = self._free_masks[row] | (1 << offset)
+        else:
+            mask = self._free_masks[row] & ~(1 << offset)
+        self._free_masks[row] = mask
+        self._longest_runs[row] = self._runs[0][mask]
+        self._windows_free[row] = mask & self._runs[3] != 0
 
     def _parse_seat(self, seat):
+        """The slot index of a seat designator."""
+        slot = self._slots.get(seat)
+        if slot is None:
+            # Not a canonical designator: either invalid, raising the
+            # appropriate error, or written differently, such as "012C"
+            return self._parse_seat_text(seat)
+        return slot
+
+    def _parse_seat_text(self, seat):
         rows, seat_letters = self._aircraft.seating_plan()
 
         letter = seat[-1]
@@ -67,7 +308,7 @@ class Flight:
         if row not in rows:
             raise ValueError(f"Invalid row number {row}")
 
-        return row, letter
+        return self._slots[f"{row}{letter}"]
 
     def relocate_passenger(self, from_seat, to_seat):
         """Relocate a passenger to a different seat.
@@ -78,36 +319,140 @@ class Flight:
 
             to_seat: The new seat designator.
         """
-        from_row, from_letter = self._parse_seat(from_seat)
-        if self._seating[from_row][from_letter] is None:
+        from_slot = self._parse_seat(from_seat)
+        if self._seating[from_slot] is None:
             raise ValueError(f"No passenger to relocate in seat {from_seat}")
 
-        to_row, to_letter = self._parse_seat(to_seat)
-        if self._seating[to_row][to_letter] is not None:
+        to_slot = self._parse_seat(to_seat)
+        if self._seating[to_slot] is not None:
             raise ValueError(f"Seat {to_seat} already occupied")
 
-        self._seating[to_row][to_letter] = self._seating[from_row][from_letter]
-        self._seating[from_row][from_letter] = None
+        passenger = self._seating[from_slot]
+        slots = self._seats[passenger]
+        slots[slots.index(from_slot)] = to_slot
+        self._remove_from_manifest(passenger, from_slot)
+        self._add_to_manifest(passenger, to_slot)
+        self._seating[to_slot] = passenger
+        self._seating[from_slot] = None
+        self._index_seat(to_slot, False)
+        self._index_seat(from_slot, True)
+
+    def release_seat(self, seat):
+        """Release a seat, as when a passenger cancels.
+
+        Args:
+            seat: The seat designator.
+
+        Returns:
+            The passenger who held the seat.
+
+        Raises:
+            ValueError: If the seat is invalid or free.
+        """
+        slot = self._parse_seat(seat)
+        passenger = self._seating[slot]
+        if passenger is None:
+            raise ValueError(f"No passenger in seat {seat}")
+
+        slots = self._seats[passenger]
+        slots.remove(slot)
+        if not slots:
+            del self._seats[passenger]
+        self._remove_from_manifest(passenger, slot)
+        self._seating[slot] = None
+        self._free += 1
+        self._index_seat(slot, True)
+        return passenger
+
+    def seat_of(self, passenger):
+        """The seat designator of a passenger.
+
+        If several passengers share a name, the first of their seats in
+        designator order.
+
+        Raises:
+            ValueError: If the passenger has no seat on this flight.
+        """
+        slots = self._seats.get(passenger)
+        if not slots:
+            raise ValueError(f"No seat for passenger {passenger}")
+        return min(self._designators[slot] for slot in slots)
+
+    def _add_to_manifest(self, passenger, slot):
+        self._manifest.append((passenger, self._designators[slot]))
+        self._manifest_sorted = False
+
+    def _remove_from_manifest(self, passenger, slot):
+        # Removing keeps the rest of the manifest in order
+        self._manifest.remove((passenger, self._designators[slot]))
 
     def num_available_seats(self):
-        return sum(
-            sum(1 for s in row.values() if s is None)
-            for row in self._seating
-            if row is not None
-        )
+        return self._free
 
     def make_boarding_cards(self, card_printer):
-        for passenger, seat in sorted(self._passenger_seats()):
+        if not self._manifest_sorted:
+            # Mostly sorted after a few changes, which Timsort merges in
+            # about linear time
+            self._manifest.sort()
+            self._manifest_sorted = True
+        # Copied, in case card_printer changes the seating
+        for passenger, seat in tuple(self._manifest):
             card_printer(passenger, seat, self.number(), self.aircraft_model())
 
     def _passenger_seats(self):
         """An iterable series of passenger seating locations"""
-        row_numbers, seat_letters = self._aircraft.seating_plan()
-        for row in row_numbers:
-            for letter in seat_letters:
-                passenger = self._seating[row][letter]
-                if passenger is not None:
-                    yield passenger, f"{row}{letter}"
+        for slot, passenger in enumerate(self._seating):
+            if passenger is not None:
+                yield passenger, self._designator(slot)
+
+    def _designator(self, slot):
+        """The seat designator of a slot index."""
+        return self._designators[slot]
+
+
+@lru_cache(maxsize=None)
+def _run_tables(width):
+    """Tables of runs of free seats, indexed by free seat bitmask.
+
+    Returns:
+        A tuple of:
+            the longest run of set bits in each mask,
+            the offset of the first run of at least k bits in each mask,
+                as a tuple indexed by k, -1 where there is none,
+            the offset of the shortest run of at least k bits in each
+                mask, the first of equal length, indexed likewise,
+            the bitmask of the window seats, at either end of the row.
+    """
+    longest = bytearray(1 << width)
+    first_fit = []
+    best_fit = []
+    for mask in range(1 << width):
+        runs = []
+        offset = 0
+        while offset < width:
+            if mask >> offset & 1:
+                start = offset
+                while offset < width and mask >> offset & 1:
+                    offset += 1
+                runs.append((offset - start, start))
+            else:
+                offset += 1
+        longest[mask] = max((length for length, _ in runs), default=0)
+        first_fit.append(
+            tuple(
+                next((start for length, start in runs if length >= k), -1)
+                for k in range(width + 1)
+            )
+        )
+        # Sorted by length, then offset
+        by_length = sorted(runs)
+        best_fit.append(
+            tuple(
+                next((start for length, start in by_length if length >= k), -1)
+                for k in range(width + 1)
+            )
+        )
+    return bytes(longest), first_fit, best_fit, 1 | 1 << (width - 1)
 
 
 class Aircraft:
@@ -126,6 +471,33 @@ class Aircraft:
         rows, row_seats = self.seating_plan()
         return len(rows) * len(row_seats)
 
+    def seat_designators(self):
+        """A list of seat designators such as '12C', in slot order.
+
+        Built once per class and shared, so the seating plan must be the
+        same for all instances of a class.
+        """
+        return self._seat_table()[0]
+
+    def seat_slots(self):
+        """A dict from each seat designator to its slot index.
+
+        Built once per class and shared, like seat_designators().
+        """
+        return self._seat_table()[1]
+
+    def _seat_table(self):
+        # Looked up in the class's own __dict__, so that a subclass with
+        # a different seating plan gets its own table
+        cls = type(self)
+        table = cls.__dict__.get("_seat_table_cache")
+        if table is None:
+            rows, row_seats = self.seating_plan()
+            designators = [f"{row}{letter}" for row, letter in product(rows, row_seats)]
+            slots = {designator: slot for slot, designator in enumerate(designators)}
+            table = cls._seat_table_cache = designators, slots
+        return table
+
 
 class AirbusA319(Aircraft):
     def model(self):
@@ -0,0 +1,284 @@
+"""Benchmark memory and seat operations of flights in airtravel.py.
+
+Usage:
+
+    python3 bench_airtravel.py [NUM_FLIGHTS]
+"""
+
+import random
+import sys
+import tracemalloc
+from timeit import default_timer as timer
+
+import airtravel
+
+
+def all_seats(aircraft):
+    """Every seat designator of an aircraft."""
+    rows, letters = aircraft.seating_plan()
+    return [f"{row}{letter}" for row in rows for letter in letters]
+
+
+def book_flights(count, load=0.5, seed=0):
+    """Make count Boeing 777 flights with a fraction of their seats booked."""
+    rng = random.Random(seed)
+    aircraft = airtravel.Boeing777("F-GSPS")
+    seats = all_seats(aircraft)
+    flights = []
+    for i in range(count):
+        flight = airtravel.Flight(f"AF{i % 10000}", aircraft)
+        for n, seat in enumerate(rng.sample(seats, int(len(seats) * load))):
+            flight.allocate_seat(seat, f"Passenger {n}")
+        flights.append(flight)
+    return flights
+
+
+def bench_memory(count):
+    """Measure memory per flight, excluding passenger names."""
+    aircraft = airtravel.Boeing777("F-GSPS")
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    flights = [airtravel.Flight("AF72", aircraft) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"  Memory per empty Boeing 777 flight: {(after - before) / count:,.0f} bytes"
+    )
+    del flights
+
+
+def bench_operations(count):
+    """Measure allocation, relocation and availability query rates."""
+    start = timer()
+    flights = book_flights(count)
+    elapsed = timer() - start
+    seats_booked = sum(
+        f._aircraft.num_seats() - f.num_available_seats() for f in flights
+    )
+    print(f"  allocate_seat:        {seats_booked / elapsed:>12,.0f} per second")
+
+    start = timer()
+    for _ in range(10):
+        for flight in flights:
+            flight.num_available_seats()
+    elapsed = timer() - start
+    print(f"  num_available_seats:  {10 * count / elapsed:>12,.0f} per second")
+
+    moves = []
+    for flight in flights:
+        taken = {seat for _, seat in flight._passenger_seats()}
+        free = [seat for seat in all_seats(flight._aircraft) if seat not in taken]
+        moves.append((flight, list(zip(sorted(taken), free))))
+    start = timer()
+    relocations = 0
+    for flight, pairs in moves:
+        for from_seat, to_seat in pairs:
+            flight.relocate_passenger(from_seat, to_seat)
+        relocations += len(pairs)
+    elapsed = timer() - start
+    print(f"  relocate_passenger:   {relocations / elapsed:>12,.0f} per second")
+
+
+def bench_parse(repeat=200):
+    """Measure seat designator parsing, valid and invalid."""
+    flight = airtravel.Flight("AF72", airtravel.Boeing777("F-GSPS"))
+    seats = all_seats(flight._aircraft)
+    start = timer()
+    for _ in range(repeat):
+        for seat in seats:
+            flight._parse_seat(seat)
+    elapsed = timer() - start
+    print(f"  _parse_seat:          {repeat * len(seats) / elapsed:>12,.0f} per second")
+
+    invalid = ["56A", "12L", "XA"] * 100
+    start = timer()
+    for seat in invalid:
+        try:
+            flight._parse_seat(seat)
+        except ValueError:
+            pass
+    elapsed = timer() - start
+    print(f"  _parse_seat, invalid: {len(invalid) / elapsed:>12,.0f} per second")
+
+
+def bench_batch(sizes=(100, 1000, 10_000, 100_000), manifest_size=400):
+    """Compare loading manifests seat by seat, in batches and automatically."""
+    aircraft = airtravel.Boeing777("F-GSPS")
+    seats = all_seats(aircraft)
+    print(f"Loading manifests of up to {manifest_size} passengers, passengers/s")
+    print(
+        f"  {'passengers':>10} {'one by one':>12} {'batch':>12} {'auto':>12} {'groups':>12}"
+    )
+    for size in sizes:
+        manifests = []
+        for start in range(0, size, manifest_size):
+            count = min(manifest_size, size - start)
+            manifests.append([f"Passenger {start + i}" for i in range(count)])
+        rng = random.Random(size)
+        seatings = [rng.sample(seats, len(manifest)) for manifest in manifests]
+
+        def flights():
+            return [airtravel.Flight("AF72", aircraft) for _ in manifests]
+
+        rates = []
+        targets = flights()
+        start = timer()
+        for flight, manifest, seating in zip(targets, manifests, seatings):
+            for seat, passenger in zip(seating, manifest):
+                flight.allocate_seat(seat, passenger)
+        rates.append(size / (timer() - start))
+
+        targets = flights()
+        start = timer()
+        for flight, manifest, seating in zip(targets, manifests, seatings):
+            flight.allocate_seats(zip(seating, manifest))
+        rates.append(size / (timer() - start))
+
+        targets = flights()
+        start = timer()
+        for flight, manifest in zip(targets, manifests):
+            flight.auto_allocate_seats(manifest, "AK")
+        rates.append(size / (timer() - start))
+
+        targets = flights()
+        start = timer()
+        for flight, manifest in zip(targets, manifests):
+            for group in range(0, len(manifest), 4):
+                flight.auto_allocate_seats(manifest[group : group + 4], together=True)
+        rates.append(size / (timer() - start))
+
+        print(f"  {size:>10} " + " ".join(f"{rate:>12,.0f}" for rate in rates))
+
+
+def scan_adjacent_seats(flight, count):
+    """Find the first block of count adjacent free seats by scanning rows."""
+    width = len(flight._aircraft.seating_plan()[1])
+    seating = flight._seating
+    for start in range(0, len(seating), width):
+        run = 0
+        for offset in range(width):
+            run = run + 1 if seating[start + offset] is None else 0
+            if run == count:
+                first = start + offset - count + 1
+                return [
+                    flight._designator(slot) for slot in range(first, first + count)
+                ]
+    return None
+
+
+def random_workload(operations, load, seed=0):
+    """A flight booked to a load factor and a random series of changes.
+
+    Returns:
+        The flight, and a list of (cancelled seat, booked seat, group
+        size) tuples which keep the load factor constant.
+    """
+    rng = random.Random(seed)
+    flight = airtravel.Flight("AF72", airtravel.Boeing777("F-GSPS"))
+    seats = all_seats(flight._aircraft)
+    taken = rng.sample(seats, int(len(seats) * load))
+    flight.allocate_seats((seat, seat) for seat in taken)
+    free = list(set(seats) - set(taken))
+    changes = []
+    for _ in range(operations):
+        i, j = rng.randrange(len(taken)), rng.randrange(len(free))
+        changes.append((taken[i], free[j], rng.randint(1, 6)))
+        taken[i], free[j] = free[j], taken[i]
+    return flight, changes
+
+
+def bench_free_seat_index(operations=100_000, load=0.8):
+    """Measure seat searches under random bookings and cancellations."""
+    print(f"{operations} cancellations, bookings and searches, {load:.0%} booked")
+    searches = {
+        "changes alone": None,
+        "find_adjacent_seats": lambda f, count: f.find_adjacent_seats(count),
+        "find_adjacent_seats best": lambda f, count: f.find_adjacent_seats(
+            count, best=True
+        ),
+        "scan for adjacent seats": scan_adjacent_seats,
+        "find_window_seat": lambda f, count: f.find_window_seat(),
+        "num_available_in_row": lambda f, count: f.num_available_in_row(count),
+    }
+    for name, search in searches.items():
+        flight, changes = random_workload(operations, load)
+        searching = 0.0
+        start = timer()
+        for cancelled, booked, count in changes:
+            flight.release_seat(cancelled)
+            flight.allocate_seat(booked, booked)
+            if search is not None:
+                search_start = timer()
+                search(flight, count)
+                searching += timer() - search_start
+        elapsed = timer() - start
+        if search is None:
+            print(f"  {name + ':':<27} {operations / elapsed:>12,.0f} per second")
+        else:
+            rate = operations / searching
+            print(f"  {name + ':':<27} {rate:>12,.0f} searches per second")
+
+
+def scan_passenger_seats(flight):
+    """Passenger seats found by scanning every slot, then sorted."""
+    return sorted(
+        (passenger, flight._designator(slot))
+        for slot, passenger in enumerate(flight._seating)
+        if passenger is not None
+    )
+
+
+def scan_seat_of(flight, passenger):
+    """A passenger's seat found by scanning every slot."""
+    for slot, passenger_in_slot in enumerate(flight._seating):
+        if passenger_in_slot == passenger:
+            return flight._designator(slot)
+    return None
+
+
+def bench_manifest(count=200):
+    """Measure boarding cards and seat lookups on fully booked flights."""
+    print(f"{count} fully booked Boeing 777 flights")
+    flights = book_flights(count, load=1.0)
+    passengers = [f"Passenger {n}" for n in range(0, 550, 7)]
+
+    def discard(*card):
+        pass
+
+    runs = {
+        "make_boarding_cards": lambda f: f.make_boarding_cards(discard),
+        "scan, sort and print": lambda f: [
+            discard(p, s, f.number(), f.aircraft_model())
+            for p, s in scan_passenger_seats(f)
+        ],
+    }
+    for name, run in runs.items():
+        start = timer()
+        for flight in flights:
+            run(flight)
+        elapsed = timer() - start
+        print(f"  {name + ':':<22} {count / elapsed:>12,.0f} flights per second")
+
+    lookups = {"seat_of": lambda f, p: f.seat_of(p), "scan for seat": scan_seat_of}
+    for name, lookup in lookups.items():
+        start = timer()
+        for flight in flights:
+            for passenger in passengers:
+                lookup(flight, passenger)
+        elapsed = timer() - start
+        rate = count * len(passengers) / elapsed
+        print(f"  {name + ':':<22} {rate:>12,.0f} lookups per second")
+
+
+def main(count=2000):
+    print(f"{count} Boeing 777 flights, half booked")
+    bench_memory(count)
+    bench_parse()
+    bench_operations(count)
+    bench_batch()
+    bench_free_seat_index()
+    bench_manifest()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
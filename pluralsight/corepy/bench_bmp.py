@@ -0,0 +1,177 @@
+"""Benchmark the BMP writers in bmp.py.
+
+Usage:
+
+    python3 bench_bmp.py
+"""
+
+import os
+import tempfile
+from timeit import default_timer as timer
+
+import bmp
+import fractal
+from bmp import _int32_to_bytes
+
+
+def write_grayscale_legacy(filename, pixels):
+    """The original header-patching writer, kept as a baseline."""
+    height = len(pixels)
+    width = len(pixels[0])
+
+    with open(filename, "wb") as bmp:
+        # BMP Header
+        bmp.write(b"BM")
+
+        size_bookmark = bmp.tell()  # The next four bytes hold the filesize as a 32-bit
+        bmp.write(
+            b"\x00\x00\x00\x00"
+        )  # little-endian integer. Zero placeholder for now.
+
+        bmp.write(b"\x00\x00")  # Unused 16-bit integer - should be zero
+        bmp.write(b"\x00\x00")  # Unused 16-bit integer - should be zero
+
+        pixel_offset_bookmark = (
+            bmp.tell()
+        )  # The next four bytes hold the integer offset to the
+        bmp.write(b"\x00\x00\x00\x00")  # pixel data. Zero placeholder for now.
+
+        # Image Header
+        bmp.write(b"\x28\x00\x00\x00")  # Image header size in bytes - 40 decimal
+        bmp.write(_int32_to_bytes(width))  # Image width in pixels
+        bmp.write(_int32_to_bytes(height))  # Image height in pixels
+        bmp.write(b"\x01\x00")  # Number of image planes
+        bmp.write(b"\x08\x00")  # Bits per pixel 8 for grayscale
+        bmp.write(b"\x00\x00\x00\x00")  # No compression
+        bmp.write(b"\x00\x00\x00\x00")  # Zero for uncompressed images
+        bmp.write(b"\x00\x00\x00\x00")  # Unused pixels per meter
+        bmp.write(b"\x00\x00\x00\x00")  # Unused pixels per meter
+        bmp.write(b"\x00\x00\x00\x00")  # Use whole color table
+        bmp.write(b"\x00\x00\x00\x00")  # All colors are important
+
+        # Color palette - a linear grayscale
+        for c in range(256):
+            bmp.write(bytes((c, c, c, 0)))  # Blue, Green, Red, Zero
+
+        # Pixel data
+        pixel_data_bookmark = bmp.tell()
+        for row in reversed(pixels):  # BMP files are bottom to top
+            row_data = bytes(row)
+            bmp.write(row_data)
+            padding = b"\x00" * (
+                (4 - (len(row) % 4)) % 4
+            )  # Pad row to multiple of four bytes
+            bmp.write(padding)
+
+        # End of file
+        eof_bookmark = bmp.tell()
+
+        # Fill in file size placeholder
+        bmp.seek(size_bookmark)
+        bmp.write(_int32_to_bytes(eof_bookmark))
+
+        # Fill in pixel offset placeholder
+        bmp.seek(pixel_offset_bookmark)
+        bmp.write(_int32_to_bytes(pixel_data_bookmark))
+
+
+def write_syscalls():
+    """The number of write system calls made so far, if Linux reports it."""
+    try:
+        with open("/proc/self/io") as io:
+            for line in io:
+                name, _, value = line.partition(":")
+                if name == "syscw":
+                    return int(value)
+    except OSError:
+        pass
+    return None
+
+
+def _measure(write_all, count):
+    """Time write_all() writing count files and count its write syscalls."""
+    before = write_syscalls()
+    start = timer()
+    write_all()
+    elapsed = timer() - start
+    after = write_syscalls()
+    syscalls = None if before is None else (after - before) / count
+    return count / elapsed, syscalls
+
+
+def bench_thumbnails(count=2000, size=64, rounds=5):
+    """Compare writer throughput on many small images.
+
+    The writers take turns over several rounds, and the best round of
+    each is reported, so that disk and cache state affect them alike.
+    """
+    images = [
+        [[(x * y + i) % 256 for x in range(size)] for y in range(size)]
+        for i in range(16)
+    ]
+    print(f"{count} thumbnails of {size}x{size}, best of {rounds} rounds")
+    print(f"{'writer':>22} {'files/s':>10} {'writes/file':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        names = [os.path.join(directory, f"{i}.bmp") for i in range(count)]
+        jobs = [(name, images[i % len(images)]) for i, name in enumerate(names)]
+
+        def legacy():
+            for name, pixels in jobs:
+                write_grayscale_legacy(name, pixels)
+
+        def single():
+            for name, pixels in jobs:
+                bmp.write_grayscale(name, pixels)
+
+        writers = {
+            "legacy": legacy,
+            "write_grayscale": single,
+            "write_grayscale_many": lambda: bmp.write_grayscale_many(jobs),
+        }
+        results = {}
+        for _ in range(rounds):
+            for name, write_all in writers.items():
+                rate, syscalls = _measure(write_all, count)
+                if rate > results.get(name, (0, None))[0]:
+                    results[name] = rate, syscalls
+    for name, (rate, syscalls) in results.items():
+        syscalls = "n/a" if syscalls is None else f"{syscalls:.1f}"
+        print(f"{name:>22} {rate:>10.0f} {syscalls:>12}")
+
+
+def bench_formats(sizes=((320, 240), (640, 480), (1280, 960))):
+    """Compare file size and encode time of the BMP formats on fractals."""
+    palette = [(c, c // 2, 255 - c) for c in range(256)]
+    writers = {
+        "grayscale": bmp.write_grayscale,
+        "rle8": bmp.write_rle8,
+        "color": lambda name, pixels: bmp.write_color(name, pixels, palette),
+    }
+    print(f"\n{'size':>10} {'format':>10} {'bytes':>10} {'ratio':>6} {'time (s)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "image.bmp")
+        for size_x, size_y in sizes:
+            try:
+                pixels = fractal.mandelbrot_array(size_x, size_y)
+            except ImportError:
+                pixels = fractal.mandelbrot(size_x, size_y)
+            baseline = None
+            for name, write in writers.items():
+                start = timer()
+                write(filename, pixels)
+                elapsed = timer() - start
+                size = os.path.getsize(filename)
+                baseline = baseline or size
+                print(
+                    f"{size_x:>4}x{size_y:<5} {name:>10} {size:>10}"
+                    f" {size / baseline:>6.2f} {elapsed:>9.4f}"
+                )
+
+
+def main():
+    bench_thumbnails()
+    bench_formats()
+
+
+if __name__ == "__main__":
+    main()
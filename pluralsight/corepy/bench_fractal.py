@@ -0,0 +1,124 @@
+"""Benchmark the Mandelbrot set renderers in fractal.py.
+
+Usage:
+
+    python3 bench_fractal.py
+"""
+
+import os
+from timeit import default_timer as timer
+
+import fractal
+
+SIZES = [(50, 40), (100, 80), (200, 160), (400, 320)]
+
+
+def bench_engines(sizes=SIZES):
+    """Compare the pure-Python and NumPy renderers at several sizes."""
+    print(f"{'size':>10} {'python (s)':>12} {'numpy (s)':>12} {'speedup':>9}")
+    for size_x, size_y in sizes:
+        start = timer()
+        expected = fractal.mandelbrot(size_x, size_y)
+        python_time = timer() - start
+
+        start = timer()
+        image = fractal.mandelbrot_array(size_x, size_y)
+        numpy_time = timer() - start
+
+        assert image.tolist() == expected, "engines disagree"
+        print(
+            f"{size_x:>4}x{size_y:<5} {python_time:>12.4f} {numpy_time:>12.4f}"
+            f" {python_time / numpy_time:>8.1f}x"
+        )
+
+
+def bench_parallel(size_x=1600, size_y=1200):
+    """Measure how the parallel renderer scales with the worker count."""
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, cpus} & set(range(1, cpus + 1)))
+
+    start = timer()
+    fractal.mandelbrot_array(size_x, size_y)
+    baseline = timer() - start
+    print(f"\n{size_x}x{size_y}, single process: {baseline:.3f}s")
+
+    print(f"{'workers':>8} {'time (s)':>10} {'speedup':>9} {'first band (s)':>15}")
+    for workers in worker_counts:
+        start = timer()
+        bands = fractal.iter_mandelbrot_bands(size_x, size_y, workers=workers)
+        next(bands)
+        first_band = timer() - start
+        for _ in bands:
+            pass
+        elapsed = timer() - start
+        print(
+            f"{workers:>8} {elapsed:>10.3f} {baseline / elapsed:>8.1f}x"
+            f" {first_band:>15.3f}"
+        )
+
+
+def bench_viewport(width=800, height=600, frames=8):
+    """Time a zoom sequence with and without reusing the previous frame."""
+    viewport = fractal.Viewport(-0.75, 3.5 / width, 256, width, height)
+    target = -0.7435 + 0.1314j
+    print(f"\n{frames} frame zoom at {width}x{height}")
+    print(f"{'frame':>6} {'scale':>12} {'fresh (s)':>10} {'reused (s)':>11}")
+    renderer = fractal.Renderer()
+    for frame in range(frames):
+        start = timer()
+        fractal.Renderer().render(viewport)
+        fresh = timer() - start
+
+        start = timer()
+        renderer.render(viewport)
+        reused = timer() - start
+
+        print(f"{frame:>6} {viewport.scale:>12.3e} {fresh:>10.4f} {reused:>11.4f}")
+        viewport = viewport.zoomed(2, center=target).panned(3, 0)
+
+
+def bench_scalar_kernel(sizes=SIZES):
+    """Report the iterations saved per frame by the fast scalar kernel."""
+    print(
+        f"\n{'size':>10} {'iterations':>12} {'fast':>12} {'subdivided':>12}"
+        f" {'saved':>7} {'time (s)':>9} {'fast (s)':>9} {'subdiv (s)':>10}"
+        f" {'wrong px':>9}"
+    )
+    for size_x, size_y in sizes:
+        start = timer()
+        expected, baseline = fractal._escape_time_grid(
+            size_x, size_y, interior_checks=False
+        )
+        plain_time = timer() - start
+
+        start = timer()
+        _, fast = fractal._escape_time_grid(size_x, size_y)
+        fast_time = timer() - start
+
+        start = timer()
+        subdivided, subdivided_work = fractal._escape_time_grid(
+            size_x, size_y, subdivide=True
+        )
+        subdivided_time = timer() - start
+
+        wrong = sum(
+            a != b
+            for row, expected_row in zip(subdivided, expected)
+            for a, b in zip(row, expected_row)
+        )
+        print(
+            f"{size_x:>4}x{size_y:<5} {baseline:>12} {fast:>12} {subdivided_work:>12}"
+            f" {1 - subdivided_work / baseline:>7.1%} {plain_time:>9.3f}"
+            f" {fast_time:>9.3f} {subdivided_time:>10.3f} {wrong:>9}"
+        )
+
+
+def main():
+    bench_engines()
+    bench_scalar_kernel()
+    bench_parallel()
+    bench_viewport()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark distinct variants, chunked pipelines and background stages.
+
+Each distinct variant runs in a child process, so that its peak memory
+can be measured on its own.
+
+Usage:
+
+    python3 bench_generators.py [NUM_ITEMS]
+
+e.g. python3 bench_generators.py 100000000
+"""
+
+import asyncio
+import operator
+import resource
+import subprocess
+import sys
+import time
+from collections import deque
+from functools import partial
+from timeit import default_timer as timer
+
+import generators
+
+
+def stream(count):
+    """Generate count integers, each of about half of them appearing twice."""
+    universe = max(1, count // 2)
+    return ((i * 2654435761) % universe for i in range(count))
+
+
+def variants(count):
+    """The distinct variants to compare, keyed by name."""
+    universe = max(1, count // 2)
+    return {
+        "set": generators.distinct,
+        "spilled": lambda items: generators.distinct_spilled(items, 1_000_000),
+        "bloom": lambda items: generators.distinct_approximate(items, universe, 0.01),
+        "window": lambda items: generators.distinct_window(items, 100_000),
+    }
+
+
+def run_variant(name, count):
+    """Run one variant to completion and report it."""
+    distinct = variants(count)[name]
+    start = timer()
+    tally = deque(enumerate(distinct(stream(count)), 1), maxlen=1)
+    elapsed = timer() - start
+    yielded = tally[0][0] if tally else 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"  {name:<8} {count / elapsed:>12,.0f} items/s {peak:>10.0f} MB peak RSS "
+        f"{yielded:>12} yielded",
+        flush=True,
+    )
+
+
+def mapped(function, iterable):
+    """A per-item map stage, written like take and distinct."""
+    for item in iterable:
+        yield function(item)
+
+
+def increment(item):
+    return item + 1
+
+
+def pipeline_times(items, function, depth, chunk_size):
+    """Time item, chunked and instrumented chunked pipelines of map stages."""
+    start = timer()
+    pipeline = iter(items)
+    for _ in range(depth):
+        pipeline = mapped(function, pipeline)
+    deque(pipeline, maxlen=0)
+    item_time = timer() - start
+
+    start = timer()
+    pipeline = generators.chunks(items, chunk_size)
+    for _ in range(depth):
+        pipeline = generators.map_chunks(function, pipeline)
+    deque(generators.unchunk(pipeline), maxlen=0)
+    chunk_time = timer() - start
+
+    stages = [partial(generators.map_chunks, function)] * depth
+    start = timer()
+    deque(generators.Pipeline(*stages).run(items, chunk_size), maxlen=0)
+    timed_time = timer() - start
+    return item_time, chunk_time, timed_time
+
+
+def bench_depth(count, max_depth=10, chunk_size=1024):
+    """Compare per-item overhead of item and chunked pipelines by depth."""
+    items = list(range(count))
+    for function in (increment, operator.neg):
+        print(
+            f"Pipelines of 1 to {max_depth} stages mapping {function.__name__} "
+            f"over {count} items, ns/item/stage"
+        )
+        print(f"  {'depth':>5} {'items':>8} {'chunks':>8} {'timed':>8}")
+        for depth in range(1, max_depth + 1):
+            times = pipeline_times(items, function, depth, chunk_size)
+            per_item = [t / count / depth * 1e9 for t in times]
+            print(f"  {depth:>5} " + " ".join(f"{t:>8.1f}" for t in per_item))
+
+
+def fetch(item, delay=0.001):
+    """Stands in for an I/O-bound call."""
+    time.sleep(delay)
+    return item
+
+
+async def fetch_async(item, delay=0.001):
+    await asyncio.sleep(delay)
+    return item
+
+
+def bench_stages(count=2000):
+    """Compare an I/O-bound stage run serially and in background stages."""
+    print(f"An I/O-bound stage (1 ms per item) over {count} items")
+    runs = {
+        "serial": lambda: map(fetch, range(count)),
+        "thread x16": lambda: generators.thread_stage(fetch, range(count), 16),
+        "thread x16 unordered": lambda: generators.thread_stage(
+            fetch, range(count), 16, ordered=False
+        ),
+        "async x64": lambda: generators.async_stage(fetch_async, range(count), 64),
+    }
+    for name, run in runs.items():
+        start = timer()
+        deque(generators.distinct(run()), maxlen=0)
+        elapsed = timer() - start
+        print(f"  {name:<22} {elapsed:.3f} s {count / elapsed:>10,.0f} items/s")
+
+    start = timer()
+    stage = generators.thread_stage(fetch, range(10**9), 16)
+    deque(generators.take(100, stage), maxlen=0)
+    print(f"  take(100) of 1e9 items, thread x16: {timer() - start:.3f} s")
+
+
+def main(count=10_000_000):
+    bench_stages()
+    bench_depth(min(count, 1_000_000))
+    print(f"distinct over {count} items, half of them duplicates")
+    for name in variants(count):
+        result = subprocess.run([sys.executable, __file__, str(count), name])
+        if result.returncode:
+            print(f"  {name:<8} failed with exit status {result.returncode}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        run_variant(sys.argv[2], int(sys.argv[1]))
+    else:
+        main(*map(int, sys.argv[1:]))
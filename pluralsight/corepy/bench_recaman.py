@@ -0,0 +1,108 @@
+"""Benchmark the Recaman sequence generators in recaman.py.
+
+Usage:
+
+    python3 bench_recaman.py [TERMS ...]
+
+Defaults to 1M and 10M terms. Pass 100000000 as well for the full
+comparison, which needs several GB of memory for the set-based
+generator.
+"""
+
+import os
+import sys
+import tempfile
+from itertools import islice
+from timeit import default_timer as timer
+
+import recaman
+
+
+def _seen_bytes(generator):
+    """Approximate the memory held by a running generator's seen values."""
+    local_variables = generator.gi_frame.f_locals
+    seen = (
+        local_variables["state"].seen
+        if "state" in local_variables
+        else local_variables["seen"]
+    )
+    if isinstance(seen, bytearray):
+        return sys.getsizeof(seen)
+    # Each int above the small int cache is a separate 28 byte object
+    return sys.getsizeof(seen) + 28 * len(seen)
+
+
+def _time_terms(generator, terms):
+    start = timer()
+    for _ in islice(generator, terms):
+        pass
+    return timer() - start
+
+
+def _time_chunks(generator, terms, chunk_size):
+    start = timer()
+    for _ in islice(generator, -(-terms // chunk_size)):
+        pass
+    return timer() - start
+
+
+def bench_generators(terms, chunk_size=65536):
+    """Compare time and memory of the generators for a number of terms."""
+    print(f"\n{terms:,} terms")
+    print(f"{'generator':>18} {'time (s)':>9} {'terms/s':>12} {'seen (MB)':>10}")
+
+    sequence = recaman.sequence()
+    elapsed = _time_terms(sequence, terms)
+    memory = _seen_bytes(sequence) / 1e6
+    del sequence
+    print(f"{'sequence':>18} {elapsed:>9.2f} {terms / elapsed:>12,.0f} {memory:>10.1f}")
+
+    elapsed = _time_terms(recaman.sequence_compact(), terms)
+    print(f"{'sequence_compact':>18} {elapsed:>9.2f} {terms / elapsed:>12,.0f}")
+
+    chunks = recaman.sequence_chunks(chunk_size)
+    elapsed = _time_chunks(chunks, terms, chunk_size)
+    memory = _seen_bytes(chunks) / 1e6
+    print(
+        f"{'sequence_chunks':>18} {elapsed:>9.2f} {terms / elapsed:>12,.0f} {memory:>10.1f}"
+    )
+
+
+def bench_write(terms, directory):
+    """Compare the output formats of write_sequence()."""
+    print(f"\nwrite_sequence, {terms:,} terms")
+    print(f"{'format':>18} {'time (s)':>9} {'terms/s':>12} {'MB':>8}")
+    filename = os.path.join(directory, "sequence")
+
+    start = timer()
+    with open(filename, mode="wt", encoding="utf-8") as f:
+        f.writelines(f"{r}\n" for r in islice(recaman.sequence(), terms))
+    elapsed = timer() - start
+    size = os.path.getsize(filename) / 1e6
+    print(
+        f"{'per-term text':>18} {elapsed:>9.2f} {terms / elapsed:>12,.0f} {size:>8.1f}"
+    )
+
+    for fmt in recaman.FORMATS:
+        start = timer()
+        recaman.write_sequence(
+            filename,
+            terms - 1,
+            fmt=fmt,
+            checkpoint=filename + ".checkpoint",
+            checkpoint_every=terms // 4,
+        )
+        elapsed = timer() - start
+        size = os.path.getsize(filename) / 1e6
+        print(f"{fmt:>18} {elapsed:>9.2f} {terms / elapsed:>12,.0f} {size:>8.1f}")
+
+
+def main(sizes):
+    for terms in sizes:
+        bench_generators(terms)
+    with tempfile.TemporaryDirectory() as directory:
+        bench_write(sizes[0], directory)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000])
@@ -0,0 +1,71 @@
+"""Benchmark the square root functions in roots.py.
+
+Usage:
+
+    python3 bench_roots.py
+"""
+
+import math
+import random
+from decimal import Context, Decimal
+from timeit import default_timer as timer
+
+import numpy as np
+
+import roots
+
+
+def bench_batch(counts=(1_000, 100_000, 1_000_000)):
+    """Compare scalar and batch square roots of random numbers."""
+    print(
+        f"{'values':>10} {'method':>12} {'time (s)':>10} {'ns/value':>9} {'max rel err':>12}"
+    )
+    for count in counts:
+        values = [random.uniform(0.0, 1e12) for _ in range(count)]
+        array = np.array(values)
+        expected = np.sqrt(array)
+        methods = {
+            "roots.sqrt": lambda: [roots.sqrt(x) for x in values],
+            "math.sqrt": lambda: [math.sqrt(x) for x in values],
+            "sqrt_array": lambda: roots.sqrt_array(array),
+            "np.sqrt": lambda: np.sqrt(array),
+        }
+        for name, method in methods.items():
+            start = timer()
+            result = method()
+            elapsed = timer() - start
+            error = np.max(np.abs(np.asarray(result) - expected) / expected)
+            print(
+                f"{count:>10} {name:>12} {elapsed:>10.4f}"
+                f" {elapsed / count * 1e9:>9.1f} {error:>12.2e}"
+            )
+
+
+def bench_precision(digit_counts=(1_000, 10_000, 100_000)):
+    """Time the exact integer and decimal square roots per digit."""
+    print(f"\n{'digits':>10} {'method':>14} {'time (s)':>10} {'us/digit':>9}")
+    for digits in digit_counts:
+        # Build the input from bits, as str() is limited to 4300 digits
+        n = random.getrandbits(math.ceil(digits * math.log2(10))) | 1
+        methods = {
+            "isqrt": lambda: roots.isqrt(n),
+            "math.isqrt": lambda: math.isqrt(n),
+            "sqrt_decimal": lambda: roots.sqrt_decimal(2, digits),
+            "Decimal.sqrt": lambda: Decimal(2).sqrt(Context(prec=digits)),
+        }
+        for name, method in methods.items():
+            start = timer()
+            method()
+            elapsed = timer() - start
+            print(
+                f"{digits:>10} {name:>14} {elapsed:>10.4f} {elapsed / digits * 1e6:>9.3f}"
+            )
+
+
+def main():
+    bench_batch()
+    bench_precision()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark the integer series readers in series.py.
+
+Usage:
+
+    python3 bench_series.py [VALUES]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from timeit import default_timer as timer
+
+import series
+
+
+def _measure(read):
+    """Time a read, then repeat it to find its peak memory use."""
+    start = timer()
+    read()
+    elapsed = timer() - start
+    tracemalloc.start()
+    read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_readers(count=2_000_000):
+    """Compare reading a file of count random integers."""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "series.txt")
+        with open(filename, "w") as f:
+            f.writelines(f"{random.getrandbits(40)}\n" for _ in range(count))
+        size = os.path.getsize(filename) / 1e6
+        print(f"{count:,} values, {size:.1f} MB")
+
+        readers = {
+            "read_series": lambda: series.read_series(filename),
+            "read_series_array": lambda: series.read_series_array(filename),
+            "cached": lambda: series.read_series_array(filename, cache=True),
+            "summarize_series": lambda: series.summarize_series(filename),
+        }
+        for workers in sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1}):
+            if workers <= (os.cpu_count() or 1):
+                readers[f"parallel ({workers})"] = (
+                    lambda workers=workers: series.read_series_parallel(
+                        filename, workers
+                    )
+                )
+        print(f"{'reader':>18} {'time (s)':>9} {'MB/s':>8} {'peak MB':>8}")
+        for name, read in readers.items():
+            elapsed, peak = _measure(read)
+            print(
+                f"{name:>18} {elapsed:>9.3f} {size / elapsed:>8.1f} {peak / 1e6:>8.1f}"
+            )
+
+
+def main():
+    bench_readers(*[int(arg) for arg in sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
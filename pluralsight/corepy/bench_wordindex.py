@@ -0,0 +1,85 @@
+"""Benchmark building and querying the word index in wordindex.py.
+
+Usage:
+
+    python3 bench_wordindex.py [NUM_WORDS]
+"""
+
+import collections
+import random
+import resource
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+import wordindex
+
+
+def generate_words(count, vocabulary_size=50_000, seed=0):
+    """Generate count words with a Zipf-like distribution."""
+    rng = random.Random(seed)
+    vocabulary = [f"wörd{i}" for i in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    for start in range(0, count, 100_000):
+        yield from rng.choices(vocabulary, weights, k=min(100_000, count - start))
+
+
+def peak_rss():
+    """The peak resident set size of this process in megabytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_build(count):
+    """Compare building the index in memory and with spilled runs."""
+    print(f"Building an index of {count} words")
+    # Peak RSS only grows, so run the smallest memory bound first
+    for max_postings in (count // 100, count // 10, count):
+        with tempfile.TemporaryDirectory() as directory:
+            start = timer()
+            index = wordindex.build_index(
+                generate_words(count), directory, max_postings
+            )
+            elapsed = timer() - start
+            print(
+                f"  max_postings={max_postings:>10}: {elapsed:.2f} s, "
+                f"{count / elapsed:,.0f} words/s, peak RSS {peak_rss():.0f} MB"
+            )
+            index.close()
+
+
+def bench_queries(count, repeat=1000):
+    """Compare index queries against recounting the word stream."""
+    print(f"Querying an index of {count} words")
+    with tempfile.TemporaryDirectory() as directory:
+        with wordindex.build_index(generate_words(count), directory) as index:
+            start = timer()
+            collections.Counter(generate_words(count)).most_common(10)
+            print(f"  Recount and top 10:     {timer() - start:.4f} s")
+
+            start = timer()
+            for _ in range(10):
+                index.top(10)
+            print(f"  Index top 10:           {(timer() - start) / 10:.4f} s")
+
+            start = timer()
+            for i in range(repeat):
+                index.count(f"wörd{i}")
+            print(
+                f"  Index count:            {(timer() - start) / repeat * 1e6:.2f} µs"
+            )
+
+            start = timer()
+            for i in range(repeat):
+                index.prefix(f"wörd{i % 100}")
+            print(
+                f"  Index prefix:           {(timer() - start) / repeat * 1e6:.2f} µs"
+            )
+
+
+def main(count=2_000_000):
+    bench_build(count)
+    bench_queries(count)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
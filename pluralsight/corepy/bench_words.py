@@ -0,0 +1,111 @@
+"""Benchmark fetching words in words.py against a local HTTP server.
+
+Usage:
+
+    python3 bench_words.py
+"""
+
+import contextlib
+import functools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from timeit import default_timer as timer
+
+import words
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    """Serves files after a fixed delay, standing in for network latency."""
+
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_documents(count, words_per_document, delay):
+    """Serve count generated documents and provide their URLs."""
+    with tempfile.TemporaryDirectory() as directory:
+        text = " ".join(f"wörd{i % 1000}" for i in range(words_per_document))
+        for i in range(count):
+            with open(f"{directory}/{i}.txt", "w", encoding="utf-8") as f:
+                f.write(text)
+        handler = type("Handler", (SlowHandler,), {"delay": delay})
+        httpd = ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(handler, directory=directory)
+        )
+        thread = threading.Thread(target=httpd.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        try:
+            port = httpd.server_address[1]
+            yield [f"http://127.0.0.1:{port}/{i}.txt" for i in range(count)]
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+def bench_fetch(count=32, words_per_document=100_000, delay=0.05):
+    """Compare sequential fetch_words() calls with iter_words()."""
+    print(
+        f"{count} documents of {words_per_document:,} words, {delay * 1000:.0f}ms latency"
+    )
+    print(f"{'method':>22} {'time (s)':>9} {'words/s':>12}")
+    with serve_documents(count, words_per_document, delay) as urls:
+        start = timer()
+        total = sum(len(words.fetch_words(url)) for url in urls)
+        elapsed = timer() - start
+        print(f"{'fetch_words':>22} {elapsed:>9.3f} {total / elapsed:>12,.0f}")
+
+        for workers in (1, 4, 16):
+            start = timer()
+            total = sum(1 for _ in words.iter_words(urls, max_workers=workers))
+            elapsed = timer() - start
+            name = f"iter_words ({workers})"
+            print(f"{name:>22} {elapsed:>9.3f} {total / elapsed:>12,.0f}")
+
+
+_WRITER = """
+import sys
+import words
+items = [f"wörd{{i % 1000}}" for i in range({count})]
+start = __import__("time").perf_counter()
+words.{function}(items)
+print(__import__("time").perf_counter() - start, file=sys.stderr)
+"""
+
+
+def bench_output(count=1_000_000):
+    """Compare print_items() and write_items() writing to a pipe."""
+    print(f"\n{count:,} words written to a pipe")
+    print(f"{'function':>22} {'time (s)':>9} {'words/s':>12}")
+    for function in ("print_items", "write_items"):
+        child = subprocess.Popen(
+            [sys.executable, "-c", _WRITER.format(count=count, function=function)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        while child.stdout.read(1 << 16):
+            pass
+        elapsed = float(child.stderr.read())
+        child.wait()
+        print(f"{function:>22} {elapsed:>9.3f} {count / elapsed:>12,.0f}")
+
+
+def main():
+    bench_fetch()
+    bench_output()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,37 @@
 """A module for dealing with BMP bitmap image files."""
 
+import functools
+import mmap
+import os
+import re
+import struct
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for Bitmap.pixels()
+    np = None
+
+# File header and BITMAPINFOHEADER, which together precede the palette
+_HEADER = struct.Struct("<2sIHHIIiiHHIIiiII")
+
+# Color palette - a linear grayscale, as Blue, Green, Red, Zero
+_GRAYSCALE_PALETTE = b"".join(bytes((c, c, c, 0)) for c in range(256))
+
+# Compression types
+BI_RGB = 0
+BI_RLE8 = 1
+
+# A run of identical bytes, for the run-length encoder
+_RUN = re.compile(rb"(.)\1*", re.DOTALL)
+
 
 def write_grayscale(filename, pixels):
     """Creates and writes a grayscale BMP file.
 
+    The whole file is assembled in memory and written with a single
+    call, so no placeholders need to be patched afterwards.
+
     Args:
         filename: The name of the BMP file to be created.
 
@@ -11,67 +39,331 @@ def write_grayscale(filename, pixels):
             Each row must be an iterable series of integers in the
             range 0-255
 
+    Raises:
+        ValueError: If any of the integer values are out of range.
+        OSError: If the file couldn't be written.
+    """
+    data = _encode_grayscale(pixels)
+    with open(filename, "wb") as bmp:
+        bmp.write(data)
+
+
+def write_grayscale_many(images):
+    """Writes many small grayscale BMP files.
+
+    One buffer is kept for each image size, with the header filled in
+    once, and only its pixel data is overwritten for each image. Where
+    rows need no padding, all the rows of an image are converted to
+    bytes in one call. Each file is then written with one system call
+    straight to its descriptor, skipping the buffered file object. This
+    is meant for bulk exports of thousands of thumbnails.
+
+    Args:
+        images: An iterable series of (filename, pixels) pairs, with
+            pixels as accepted by write_grayscale().
+
+    Returns:
+        The number of files written.
+
+    Raises:
+        ValueError: If any of the integer values are out of range.
+        OSError: If a file couldn't be written.
+    """
+    buffers = {}
+    count = 0
+    for filename, pixels in images:
+        height = len(pixels)
+        width = len(pixels[0])
+        stride = _row_stride(width)
+        data = buffers.get((width, height))
+        if data is None:
+            header = _header(width, height)
+            data = bytearray(len(header) + stride * height)
+            data[: len(header)] = header
+            buffers[width, height] = data
+        offset = len(data) - stride * height
+        if stride == width and all(len(row) == width for row in pixels):
+            # BMP files are bottom to top
+            data[offset:] = bytes(chain.from_iterable(reversed(pixels)))
+        else:
+            offset = len(data)
+            for row in pixels:
+                offset -= stride
+                data[offset : offset + width] = _checked_row(row, width)
+
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+        count += 1
+    return count
+
+
+def _encode_grayscale(pixels):
+    """The complete contents of a grayscale BMP file, as a bytearray."""
+    height = len(pixels)
+    width = len(pixels[0])
+    header = _header(width, height)
+    stride = _row_stride(width)
+
+    data = bytearray(len(header) + stride * height)
+    data[: len(header)] = header
+    offset = len(data)
+    for row in pixels:  # BMP files are bottom to top, so fill from the end
+        offset -= stride
+        data[offset : offset + width] = _checked_row(row, width)
+    return data
+
+
+def write_rle8(filename, pixels, palette=None):
+    """Creates and writes a run-length encoded 8-bit BMP file.
+
+    Flat regions of the image compress to two bytes per run of up to
+    255 pixels, so this is much smaller than write_grayscale() for
+    images like fractals.
+
+    Args:
+        filename: The name of the BMP file to be created.
+
+        pixels: A rectangular image stored as a sequence of rows.
+            Each row must be an iterable series of integers in the
+            range 0-255, or a bytes-like object.
+
+        palette: An optional sequence of up to 256 (red, green, blue)
+            tuples. Defaults to a linear grayscale.
+
     Raises:
         ValueError: If any of the integer values are out of range.
         OSError: If the file couldn't be written.
     """
     height = len(pixels)
     width = len(pixels[0])
+    encoded = [_rle8_row(_checked_row(row, width)) for row in reversed(pixels)]
+    encoded.append(b"\x00\x01")  # End of bitmap
+    image_size = sum(map(len, encoded))
+    header = _header(width, height, 8, BI_RLE8, image_size, _palette_bytes(palette))
+    with open(filename, "wb") as bmp:
+        bmp.write(b"".join([header] + encoded))
+
+
+def write_color(filename, pixels, palette=None):
+    """Creates and writes a 24-bit color BMP file.
+
+    Each pixel value is looked up in the palette and stored as its
+    color. The lookups are done a whole row at a time, one color
+    channel at a time, with bytes.translate().
 
+    Args:
+        filename: The name of the BMP file to be created.
+
+        pixels: A rectangular image stored as a sequence of rows.
+            Each row must be an iterable series of integers in the
+            range 0-255, or a bytes-like object.
+
+        palette: An optional sequence of up to 256 (red, green, blue)
+            tuples. Defaults to a linear grayscale.
+
+    Raises:
+        ValueError: If any of the integer values are out of range, or
+            not in the palette.
+        OSError: If the file couldn't be written.
+    """
+    table = _palette_bytes(palette)
+    colors = len(table) // 4
+    # One translation table per channel, in file order: blue, green, red
+    channels = [table[channel::4].ljust(256, b"\x00") for channel in range(3)]
+
+    height = len(pixels)
+    width = len(pixels[0])
+    header = _header(width, height, 24, palette=b"")
+    stride = _row_stride(3 * width)
+    data = bytearray(len(header) + stride * height)
+    data[: len(header)] = header
+    offset = len(data)
+    for row in pixels:  # BMP files are bottom to top, so fill from the end
+        row_data = bytes(_checked_row(row, width))
+        if colors < 256 and max(row_data, default=0) >= colors:
+            raise ValueError(f"Pixel value out of range for {colors} color palette")
+        offset -= stride
+        for channel, channel_table in enumerate(channels):
+            data[offset + channel : offset + 3 * width : 3] = row_data.translate(
+                channel_table
+            )
     with open(filename, "wb") as bmp:
-        # BMP Header
-        bmp.write(b"BM")
-
-        size_bookmark = bmp.tell()  # The next four bytes hold the filesize as a 32-bit
-        bmp.write(
-            b"\x00\x00\x00\x00"
-        )  # little-endian integer. Zero placeholder for now.
-
-        bmp.write(b"\x00\x00")  # Unused 16-bit integer - should be zero
-        bmp.write(b"\x00\x00")  # Unused 16-bit integer - should be zero
-
-        pixel_offset_bookmark = (
-            bmp.tell()
-        )  # The next four bytes hold the integer offset to the
-        bmp.write(b"\x00\x00\x00\x00")  # pixel data. Zero placeholder for now.
-
-        # Image Header
-        bmp.write(b"\x28\x00\x00\x00")  # Image header size in bytes - 40 decimal
-        bmp.write(_int32_to_bytes(width))  # Image width in pixels
-        bmp.write(_int32_to_bytes(height))  # Image height in pixels
-        bmp.write(b"\x01\x00")  # Number of image planes
-        bmp.write(b"\x08\x00")  # Bits per pixel 8 for grayscale
-        bmp.write(b"\x00\x00\x00\x00")  # No compression
-        bmp.write(b"\x00\x00\x00\x00")  # Zero for uncompressed images
-        bmp.write(b"\x00\x00\x00\x00")  # Unused pixels per meter
-        bmp.write(b"\x00\x00\x00\x00")  # Unused pixels per meter
-        bmp.write(b"\x00\x00\x00\x00")  # Use whole color table
-        bmp.write(b"\x00\x00\x00\x00")  # All colors are important
-
-        # Color palette - a linear grayscale
-        for c in range(256):
-            bmp.write(bytes((c, c, c, 0)))  # Blue, Green, Red, Zero
-
-        # Pixel data
-        pixel_data_bookmark = bmp.tell()
-        for row in reversed(pixels):  # BMP files are bottom to top
-            row_data = bytes(row)
-            bmp.write(row_data)
-            padding = b"\x00" * (
-                (4 - (len(row) % 4)) % 4
-            )  # Pad row to multiple of four bytes
-            bmp.write(padding)
-
-        # End of file
-        eof_bookmark = bmp.tell()
-
-        # Fill in file size placeholder
-        bmp.seek(size_bookmark)
-        bmp.write(_int32_to_bytes(eof_bookmark))
-
-        # Fill in pixel offset placeholder
-        bmp.seek(pixel_offset_bookmark)
-        bmp.write(_int32_to_bytes(pixel_data_bookmark))
+        bmp.write(data)
+
+
+def _rle8_row(row):
+    """Run-length encode one row of pixels, ending with an end-of-line."""
+    encoded = bytearray()
+    literal = bytearray()
+    for run in _RUN.finditer(row):
+        value = run.group(1)[0]
+        length = run.end() - run.start()
+        if length == 1:
+            literal.append(value)
+            continue
+        _flush_literal(encoded, literal)
+        while length:
+            count = min(length, 255)
+            encoded += bytes((count, value))
+            length -= count
+    _flush_literal(encoded, literal)
+    encoded += b"\x00\x00"  # End of line
+    return bytes(encoded)
+
+
+def _flush_literal(encoded, literal):
+    """Append pending single pixels to an RLE8 stream and clear them."""
+    for start in range(0, len(literal), 255):
+        chunk = literal[start : start + 255]
+        if len(chunk) < 3:
+            # Absolute mode needs at least three pixels
+            for value in chunk:
+                encoded += bytes((1, value))
+        else:
+            encoded += bytes((0, len(chunk)))
+            encoded += chunk
+            if len(chunk) % 2:
+                encoded.append(0)  # Absolute runs are padded to 16 bits
+    literal.clear()
+
+
+def _checked_row(row, width):
+    """A row of pixels as a bytes-like object of exactly width bytes."""
+    row_data = _row_bytes(row)
+    if len(row_data) != width:
+        raise ValueError(f"Image is not rectangular: expected rows of {width}")
+    return row_data
+
+
+def write_grayscale_rows(filename, width, height, rows):
+    """Creates and writes a grayscale BMP file one row at a time.
+
+    The file is allocated at its final size up front and each row is
+    copied straight to its place in a memory map, so only one row is
+    ever held in memory and rows may come from a generator.
+
+    Args:
+        filename: The name of the BMP file to be created.
+
+        width: The image width in pixels.
+
+        height: The image height in pixels.
+
+        rows: An iterable series of exactly height rows, top to
+            bottom. Each row is either a bytes-like object of width
+            bytes (bytes, bytearray, array('B'), memoryview...),
+            which is written without conversion, or an iterable
+            series of width integers in the range 0-255.
+
+    Raises:
+        ValueError: If any of the integer values are out of range, or
+            the rows don't match the width and height.
+        OSError: If the file couldn't be written.
+    """
+    header = _header(width, height)
+    stride = _row_stride(width)
+    file_size = len(header) + stride * height
+
+    with open(filename, "w+b") as bmp:
+        bmp.truncate(file_size)  # Zero filled, so row padding is already done
+        with mmap.mmap(bmp.fileno(), file_size) as data:
+            data[: len(header)] = header
+            row_count = 0
+            for row_count, row in enumerate(rows, start=1):
+                if row_count > height:
+                    raise ValueError(f"More than {height} rows supplied")
+                row_data = _row_bytes(row)
+                if len(row_data) != width:
+                    raise ValueError(
+                        f"Row {row_count - 1} has {len(row_data)} pixels, "
+                        f"expected {width}"
+                    )
+                # BMP files are bottom to top
+                offset = len(header) + (height - row_count) * stride
+                data[offset : offset + width] = row_data
+            if row_count != height:
+                raise ValueError(f"Expected {height} rows, got {row_count}")
+
+
+def _row_bytes(row):
+    """A row of pixels as a bytes-like object, copying only if needed."""
+    try:
+        view = memoryview(row)
+    except TypeError:
+        return bytes(row)
+    if view.itemsize != 1:
+        return bytes(view.tolist())
+    if not view.c_contiguous:
+        return view.tobytes()
+    return view.cast("B") if view.format != "B" else view
+
+
+def _row_stride(width):
+    """The size in bytes of a row padded to a multiple of four bytes."""
+    return (width + 3) & ~3
+
+
+@functools.lru_cache(maxsize=256)
+def _header(
+    width,
+    height,
+    bits_per_pixel=8,
+    compression=BI_RGB,
+    image_size=0,
+    palette=_GRAYSCALE_PALETTE,
+):
+    """The BMP header, image header and palette of an image.
+
+    Args:
+        width: The image width in pixels.
+        height: The image height in pixels.
+        bits_per_pixel: 8 for palette images, 24 for color images.
+        compression: BI_RGB or BI_RLE8.
+        image_size: The size of the compressed pixel data. Zero for
+            uncompressed images, whose size follows from the width.
+        palette: The color table as bytes, four per entry.
+    """
+    pixel_offset = _HEADER.size + len(palette)
+    if compression == BI_RGB:
+        data_size = _row_stride(width * bits_per_pixel // 8) * height
+    else:
+        data_size = image_size
+    colors = len(palette) // 4
+    return (
+        _HEADER.pack(
+            b"BM",
+            pixel_offset + data_size,  # File size
+            0,  # Unused 16-bit integer - should be zero
+            0,  # Unused 16-bit integer - should be zero
+            pixel_offset,
+            40,  # Image header size in bytes
+            width,
+            height,
+            1,  # Number of image planes
+            bits_per_pixel,
+            compression,
+            image_size,  # Zero for uncompressed images
+            0,  # Unused pixels per meter
+            0,  # Unused pixels per meter
+            0 if colors == 256 else colors,  # Zero to use whole color table
+            0,  # All colors are important
+        )
+        + palette
+    )
+
+
+def _palette_bytes(palette):
+    """Convert a sequence of (red, green, blue) tuples to a BMP color table."""
+    if palette is None:
+        return _GRAYSCALE_PALETTE
+    if not 0 < len(palette) <= 256:
+        raise ValueError(f"Palette must have 1-256 colors, not {len(palette)}")
+    return b"".join(bytes((blue, green, red, 0)) for red, green, blue in palette)
 
 
 # Bitwise operators
@@ -111,3 +403,152 @@ def dimensions(filename):
 def _bytes_to_int32(b):
     "Convert a bytes object containing four bytes into an integer."
     return b[0] | (b[1] << 8) | (b[2] << 16) | (b[3] << 24)
+
+
+class Bitmap:
+    """A read-only, memory-mapped view of an uncompressed BMP file.
+
+    Opening a bitmap only parses its header, however large the file.
+    Pixel data is exposed as views onto the memory map, so only the
+    pages which are actually looked at are read from disk.
+
+    Use as a context manager, or call close() when done. Any views
+    obtained from the bitmap must be released before it is closed.
+
+    Attributes:
+        width: The image width in pixels.
+        height: The image height in pixels.
+        bits_per_pixel: 8 for palette images, 24 for color images.
+        compression: The BMP compression code, zero if uncompressed.
+        colors_used: The number of palette entries, zero meaning all.
+        pixel_offset: The offset of the pixel data in the file.
+        stride: The size in bytes of each padded row.
+        top_down: True if rows are stored top to bottom.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header(filename)
+        except Exception:
+            self._map.close()
+            raise
+
+    def _parse_header(self, filename):
+        if len(self._map) < _HEADER.size:
+            raise ValueError("{} is not a BMP file".format(filename))
+        (
+            magic,
+            _file_size,
+            _,
+            _,
+            self.pixel_offset,
+            _info_size,
+            self.width,
+            height,
+            _planes,
+            self.bits_per_pixel,
+            self.compression,
+            _image_size,
+            _,
+            _,
+            self.colors_used,
+            _,
+        ) = _HEADER.unpack_from(self._map)
+        if magic != b"BM":
+            raise ValueError("{} is not a BMP file".format(filename))
+
+        # A negative height marks a top-down bitmap
+        self.top_down = height < 0
+        self.height = abs(height)
+        self.stride = _row_stride(self.width * self.bits_per_pixel // 8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def palette(self):
+        """The color table as a list of (red, green, blue) tuples."""
+        if self.bits_per_pixel > 8:
+            return []
+        count = self.colors_used or 1 << self.bits_per_pixel
+        start = self.pixel_offset - 4 * count
+        table = self._map[start : self.pixel_offset]
+        return [(r, g, b) for b, g, r, _ in struct.iter_unpack("4B", table)]
+
+    def row(self, y):
+        """A zero-copy view of one row of pixel data.
+
+        Args:
+            y: The row number, counting from the top of the image.
+
+        Returns:
+            A memoryview of the row bytes, without padding. For 24-bit
+            images each pixel is three bytes in blue, green, red order.
+        """
+        self._check_uncompressed()
+        if not 0 <= y < self.height:
+            raise IndexError(f"Row {y} out of range")
+        if not self.top_down:
+            y = self.height - 1 - y
+        start = self.pixel_offset + y * self.stride
+        return memoryview(self._map)[
+            start : start + self.width * self.bits_per_pixel // 8
+        ]
+
+    def pixels(self):
+        """A zero-copy NumPy view of the whole image, top row first.
+
+        Row padding and bottom-up storage are handled with strides, so
+        this is cheap for any image size and slicing it (for a crop)
+        only touches the pages holding the selected pixels.
+
+        Returns:
+            A read-only uint8 array of shape (height, width) for 8-bit
+            images, or (height, width, 3) in blue, green, red order for
+            24-bit images.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("Bitmap.pixels() requires NumPy")
+        self._check_uncompressed()
+
+        if self.bits_per_pixel == 8:
+            shape = (self.height, self.width)
+            strides = (self.stride, 1)
+        elif self.bits_per_pixel == 24:
+            shape = (self.height, self.width, 3)
+            strides = (self.stride, 3, 1)
+        else:
+            raise ValueError(f"Unsupported bits per pixel {self.bits_per_pixel}")
+
+        offset = self.pixel_offset
+        if not self.top_down and self.height:
+            offset += (self.height - 1) * self.stride
+            strides = (-self.stride,) + strides[1:]
+        return np.ndarray(
+            shape, dtype=np.uint8, buffer=self._map, offset=offset, strides=strides
+        )
+
+    def crop(self, left, top, right, bottom):
+        """A zero-copy view of the pixels in a rectangle.
+
+        Args:
+            left, top: The first column and row included.
+            right, bottom: The first column and row excluded.
+        """
+        return self.pixels()[top:bottom, left:right]
+
+    def _check_uncompressed(self):
+        if self.compression != 0:
+            raise ValueError(
+                f"Cannot view pixels of compressed bitmap (type {self.compression})"
+            )
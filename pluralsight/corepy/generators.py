@@ -1,9 +1,34 @@
+import asyncio
+import math
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent import futures
+from functools import partial
+from itertools import chain, islice
+from time import perf_counter
+
+_MASK64 = (1 << 64) - 1
+_MIX1 = 0x9E3779B97F4A7C15
+_MIX2 = 0xC2B2AE3D27D4EB4F
+
+
 def take(count, iterable):
     counter = 0
+    if counter >= count:
+        _cancel(iterable)
+        return
     for item in iterable:
+        counter += 1
         if counter == count:
+            # Stop upstream workers before handing over the last item
+            _cancel(iterable)
+            yield item
             return
-        counter += 1
         yield item
 
 
@@ -16,6 +41,531 @@ def distinct(iterable):
         seen.add(item)
 
 
+def distinct_spilled(iterable, max_items=1_000_000, directory=None):
+    """Yield the distinct items of an iterable, spilling seen items to disk.
+
+    Seen items are held in a set until there are max_items of them, then
+    moved to a temporary SQLite database, keyed by their pickle. Equal
+    items must pickle to equal bytes, as str, bytes, int and tuples of
+    them do.
+
+    Args:
+        iterable: An iterable series of hashable, picklable items.
+        max_items: The number of seen items held in memory.
+        directory: The directory for the temporary database, or None
+            for the system default.
+    """
+    seen = set()
+    database = None
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        try:
+            for item in iterable:
+                if item in seen:
+                    continue
+                if database is not None:
+                    key = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+                    found = database.execute(
+                        "SELECT 1 FROM seen WHERE key = ?", (key,)
+                    ).fetchone()
+                    if found:
+                        continue
+                yield item
+                seen.add(item)
+                if len(seen) >= max_items:
+                    if database is None:
+                        database = _open_spill(os.path.join(tmp, "seen.db"))
+                    # Inserting in key order keeps writes to the B-tree local
+                    keys = sorted(
+                        pickle.dumps(s, pickle.HIGHEST_PROTOCOL) for s in seen
+                    )
+                    database.execute("BEGIN")
+                    database.executemany(
+                        "INSERT OR IGNORE INTO seen VALUES (?)", ((k,) for k in keys)
+                    )
+                    database.execute("COMMIT")
+                    seen.clear()
+        finally:
+            if database is not None:
+                database.close()
+
+
+def _open_spill(filename):
+    database = sqlite3.connect(filename, isolation_level=None)
+    # Only this connection uses the database, so skip locking per statement
+    database.execute("PRAGMA locking_mode = EXCLUSIVE")
+    database.execute("PRAGMA journal_mode = OFF")
+    database.execute("PRAGMA synchronous = OFF")
+    database.execute("PRAGMA cache_size = -65536")
+    database.execute("CREATE TABLE seen (key BLOB PRIMARY KEY) WITHOUT ROWID")
+    return database
+
+
+class BloomFilter:
+    """A fixed-size set of items which may report false positives.
+
+    Items are identified by hash(), so a filter is only meaningful
+    within one process.
+
+    Args:
+        capacity: The number of items the filter is sized for.
+        error_rate: The false positive rate once capacity items have
+            been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        if capacity < 1:
+            raise ValueError(f"Capacity {capacity} is not positive")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"Error rate {error_rate} is not between 0 and 1")
+        self._size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    @property
+    def nbytes(self):
+        """The size of the filter's bit array in bytes."""
+        return len(self._bits)
+
+    def __contains__(self, item):
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, item):
+        """Add an item to the filter.
+
+        Returns:
+            True if the item may already have been in the filter, False
+            if it certainly was not.
+        """
+        bits = self._bits
+        present = True
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                present = False
+        return present
+
+    def _positions(self, item):
+        # Double hashing: positions h1 + i * h2 from two mixes of hash(item)
+        h = hash(item) & _MASK64
+        h1 = h * _MIX1 & _MASK64
+        h2 = ((h ^ (h >> 29)) * _MIX2 & _MASK64) | 1
+        size = self._size
+        return [(h1 + i * h2) % size for i in range(self._hashes)]
+
+
+def distinct_approximate(iterable, capacity, error_rate=0.01):
+    """Yield the distinct items of an iterable in fixed memory.
+
+    A Bloom filter records seen items, so some distinct items, about
+    error_rate of them once capacity have been seen, are wrongly dropped
+    as duplicates. Duplicates are never yielded.
+
+    Args:
+        iterable: An iterable series of hashable items.
+        capacity: The number of distinct items expected.
+        error_rate: The tolerated rate of wrongly dropped items.
+    """
+    seen = BloomFilter(capacity, error_rate)
+    for item in iterable:
+        if not seen.add(item):
+            yield item
+
+
+def distinct_window(iterable, size):
+    """Yield the items of an iterable not among the most recently seen.
+
+    An item is dropped if it is equal to one of the last size distinct
+    items seen, where seeing a duplicate counts as seeing it again.
+
+    Args:
+        iterable: An iterable series of hashable items.
+        size: The number of recently seen items remembered.
+    """
+    if size < 1:
+        raise ValueError(f"Window size {size} is not positive")
+    recent = OrderedDict()
+    for item in iterable:
+        if item in recent:
+            recent.move_to_end(item)
+            continue
+        yield item
+        recent[item] = None
+        if len(recent) > size:
+            recent.popitem(last=False)
+
+
+def chunks(iterable, size=1024):
+    """Group the items of an iterable into lists of up to size items."""
+    if size < 1:
+        raise ValueError(f"Chunk size {size} is not positive")
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def unchunk(chunks):
+    """Yield the items of a series of chunks."""
+    return chain.from_iterable(chunks)
+
+
+def take_chunks(count, chunks):
+    """The chunked equivalent of take.
+
+    No chunks are pulled after the one containing the last item needed.
+    """
+    remaining = count
+    if remaining <= 0:
+        _cancel(chunks)
+        return
+    for chunk in chunks:
+        if len(chunk) >= remaining:
+            _cancel(chunks)
+            yield chunk[:remaining]
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+
+def distinct_chunks(chunks):
+    """The chunked equivalent of distinct."""
+    seen = set()
+    add = seen.add
+    for chunk in chunks:
+        # add() returns None, so each new item is recorded as it passes
+        chunk = [item for item in chunk if not (item in seen or add(item))]
+        if chunk:
+            yield chunk
+
+
+def map_chunks(function, chunks):
+    """The chunked equivalent of map."""
+    for chunk in chunks:
+        yield list(map(function, chunk))
+
+
+def filter_chunks(predicate, chunks):
+    """The chunked equivalent of filter."""
+    for chunk in chunks:
+        chunk = list(filter(predicate, chunk))
+        if chunk:
+            yield chunk
+
+
+class Pipeline:
+    """A series of chunked stages, with per-stage counters and timing.
+
+    Each stage is a callable taking an iterable series of chunks and
+    returning one, such as distinct_chunks, or
+    functools.partial(take_chunks, 10).
+
+    Args:
+        stages: The stages, in the order items pass through them.
+    """
+
+    def __init__(self, *stages):
+        self._stages = stages
+        self._counters = []
+
+    def run(self, iterable, chunk_size=1024):
+        """Pass the items of an iterable through the stages.
+
+        Counters and timing are reset on each run.
+
+        Returns:
+            An iterator over the items output by the last stage.
+        """
+        counted = _Counted(chunks(iterable, chunk_size))
+        self._counters = [("chunks", counted)]
+        for stage in self._stages:
+            counted = _Counted(stage(counted))
+            self._counters.append((_stage_name(stage), counted))
+        return unchunk(counted)
+
+    def stats(self):
+        """Counters for the source and each stage of the last run.
+
+        Returns:
+            A list of (name, chunks, items, seconds) tuples, where
+            items are those output by the stage and seconds is the time
+            spent in the stage itself, excluding upstream stages.
+        """
+        stats = []
+        upstream = 0.0
+        for name, counted in self._counters:
+            stats.append(
+                (name, counted.chunks, counted.items, counted.seconds - upstream)
+            )
+            upstream = counted.seconds
+        return stats
+
+    def report(self):
+        """Format the stats of the last run as a table."""
+        lines = [f"{'stage':<20} {'chunks':>10} {'items':>12} {'seconds':>10}"]
+        for name, chunk_count, item_count, seconds in self.stats():
+            lines.append(
+                f"{name:<20} {chunk_count:>10} {item_count:>12} {seconds:>10.4f}"
+            )
+        return "\n".join(lines)
+
+
+class _Counted:
+    """Wraps an iterator over chunks, counting them and timing next()."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.chunks = 0
+        self.items = 0
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = perf_counter()
+        try:
+            chunk = next(self._chunks)
+        finally:
+            self.seconds += perf_counter() - start
+        self.chunks += 1
+        self.items += len(chunk)
+        return chunk
+
+
+def _stage_name(stage):
+    while isinstance(stage, partial):
+        stage = stage.func
+    return getattr(stage, "__name__", repr(stage))
+
+
+class Stage:
+    """Applies a function to the items of an iterable in the background.
+
+    Items are pulled from the iterable and submitted to an executor as
+    the output is consumed, with at most max_pending of them submitted
+    but not yet consumed. This bounds memory and applies backpressure to
+    the iterable, while letting slow calls overlap.
+
+    Stages are usually made with thread_stage, process_stage or
+    async_stage. take() cancels a Stage it reads from once it has
+    enough items. A Stage is also cancelled when it is garbage
+    collected, so one read through a generator or map() is cancelled
+    once that is, and its executor never outlives it.
+
+    Args:
+        function: A callable taking one item, submitted to the executor.
+        iterable: An iterable series of items.
+        executor: A concurrent.futures.Executor, or any object with a
+            compatible submit() method.
+        max_pending: The most items submitted but not yet consumed.
+        ordered: If True, output items in the order of the input,
+            otherwise in the order they are completed.
+        shutdown: A callable to release the executor once the stage is
+            exhausted or cancelled, or None.
+    """
+
+    def __init__(
+        self, function, iterable, executor, max_pending, ordered=True, shutdown=None
+    ):
+        if max_pending < 1:
+            raise ValueError(f"Max pending {max_pending} is not positive")
+        self._function = function
+        self._items = iter(iterable)
+        self._submit = executor.submit
+        self._max_pending = max_pending
+        self._ordered = ordered
+        self._pending = deque() if ordered else set()
+        self._done = deque()
+        self._exhausted = False
+        self._cancelled = False
+        # Holds no reference to the stage, so it can run when the stage
+        # is garbage collected
+        self._finalizer = weakref.finalize(
+            self, _release, self._pending, self._done, shutdown, iterable
+        )
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._cancelled:
+            raise StopIteration
+        try:
+            self._fill()
+            if not self._pending and not self._done:
+                self.cancel()
+                raise StopIteration
+            return self._next_future().result()
+        except BaseException:
+            self.cancel()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cancel()
+
+    def cancel(self):
+        """Stop submitting items, cancel pending calls and cancel upstream.
+
+        Calls already running are left to finish in the background.
+        """
+        self._cancelled = True
+        self._finalizer()
+
+    def close(self):
+        """Cancel the stage, as closing a generator does."""
+        self.cancel()
+
+    def _fill(self):
+        while not self._exhausted and (
+            len(self._pending) + len(self._done) < self._max_pending
+        ):
+            try:
+                item = next(self._items)
+            except StopIteration:
+                self._exhausted = True
+                break
+            future = self._submit(self._function, item)
+            if self._ordered:
+                self._pending.append(future)
+            else:
+                self._pending.add(future)
+
+    def _next_future(self):
+        if self._ordered:
+            return self._pending.popleft()
+        if not self._done:
+            done, _ = futures.wait(self._pending, return_when=futures.FIRST_COMPLETED)
+            self._pending -= done
+            self._done.extend(done)
+        return self._done.popleft()
+
+
+def thread_stage(function, iterable, workers=4, max_pending=None, ordered=True):
+    """Apply a function to the items of an iterable in a thread pool.
+
+    Suits functions which spend their time waiting on I/O.
+
+    Args:
+        function: A callable taking one item.
+        iterable: An iterable series of items.
+        workers: The number of threads.
+        max_pending: The most items submitted but not yet consumed,
+            by default twice the number of workers.
+        ordered: If True, output items in the order of the input.
+
+    Returns:
+        A Stage over the results.
+    """
+    executor = futures.ThreadPoolExecutor(workers)
+    return Stage(
+        function,
+        iterable,
+        executor,
+        max_pending or 2 * workers,
+        ordered,
+        partial(executor.shutdown, wait=False, cancel_futures=True),
+    )
+
+
+def process_stage(function, iterable, workers=None, max_pending=None, ordered=True):
+    """Apply a function to the items of an iterable in a process pool.
+
+    Suits CPU-bound functions. The function, items and results must be
+    picklable.
+
+    Args:
+        function: A callable taking one item.
+        iterable: An iterable series of items.
+        workers: The number of processes, by default the CPU count.
+        max_pending: The most items submitted but not yet consumed,
+            by default twice the number of workers.
+        ordered: If True, output items in the order of the input.
+
+    Returns:
+        A Stage over the results.
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = futures.ProcessPoolExecutor(workers)
+    return Stage(
+        function,
+        iterable,
+        executor,
+        max_pending or 2 * workers,
+        ordered,
+        partial(executor.shutdown, wait=False, cancel_futures=True),
+    )
+
+
+def async_stage(function, iterable, max_pending=16, ordered=True):
+    """Await a coroutine function on the items of an iterable.
+
+    The coroutines run as tasks on an event loop in a background thread,
+    up to max_pending at a time.
+
+    Args:
+        function: A coroutine function taking one item.
+        iterable: An iterable series of items.
+        max_pending: The most items submitted but not yet consumed.
+        ordered: If True, output items in the order of the input.
+
+    Returns:
+        A Stage over the results.
+    """
+    executor = _EventLoopThread()
+    return Stage(function, iterable, executor, max_pending, ordered, executor.shutdown)
+
+
+class _EventLoopThread:
+    """Runs coroutines on an event loop in a daemon thread."""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, function, item):
+        return asyncio.run_coroutine_threadsafe(function(item), self._loop)
+
+    def shutdown(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        # Let cancelled tasks unwind before closing the loop
+        tasks = asyncio.all_tasks(self._loop)
+        if tasks:
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        self._loop.close()
+
+
+def _release(pending, done, shutdown, upstream):
+    """Cancel a Stage's pending calls, release its executor and cancel upstream."""
+    for future in pending:
+        future.cancel()
+    pending.clear()
+    done.clear()
+    if shutdown is not None:
+        shutdown()
+    _cancel(upstream)
+
+
+def _cancel(iterable):
+    """Cancel an iterable if it is a Stage."""
+    if isinstance(iterable, Stage):
+        iterable.cancel()
+
+
 def run_pipeline():
     items = [3, 6, 6, 2, 1, 1]
     # List constructor used to eval generated items to simplify control flow
@@ -23,4 +573,5 @@ def run_pipeline():
         print(item)
 
 
-run_pipeline()
+if __name__ == "__main__":
+    run_pipeline()
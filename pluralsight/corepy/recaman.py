@@ -1,5 +1,15 @@
+import argparse
+import os
+import struct
 import sys
-from itertools import count, islice
+from array import array
+from itertools import count
+
+FORMATS = ("text", "u64", "varint")
+
+# Checkpoint file header: magic, format index, a, n, output offset, terms written
+_CHECKPOINT = struct.Struct("<8sQQQQQ")
+_CHECKPOINT_MAGIC = b"RECAMAN1"
 
 
 def sequence():
@@ -16,11 +26,239 @@ def sequence():
         a = c
 
 
-def write_sequence(filename, num):
-    """Write Recaman's sequence to a tet file."""
-    with open(filename, mode="wt", encoding="utf-8") as f:
-        f.writelines(f"{r}\n" for r in islice(sequence(), num + 1))
+def sequence_compact():
+    """Generate Recaman's sequence using a bitset of seen values.
+
+    Produces the same terms as sequence(), but remembers the values
+    seen so far as one bit each in a growable bytearray rather than
+    as a set of Python ints, which takes a small fraction of the memory.
+    """
+    for chunk in sequence_chunks():
+        yield from chunk
+
+
+def sequence_chunks(chunk_size=65536):
+    """Generate Recaman's sequence in blocks.
+
+    Args:
+        chunk_size: The number of terms in each block.
+
+    Yields:
+        array('Q') buffers of chunk_size consecutive terms.
+    """
+    state = RecamanState()
+    while True:
+        yield state.advance(chunk_size)
+
+
+class RecamanState:
+    """The resumable state of a Recaman's sequence generator.
+
+    Attributes:
+        a: The next term.
+        n: The index of the next term, counting from one.
+        seen: A bitset of the values seen so far.
+    """
+
+    def __init__(self, a=0, n=1, seen=None):
+        self.a = a
+        self.n = n
+        self.seen = bytearray(1 << 16) if seen is None else seen
+
+    def advance(self, count):
+        """Generate the next count terms.
+
+        Returns:
+            An array('Q') of the terms.
+        """
+        seen = self.seen
+        a = self.a
+        n = self.n
+        terms = array("Q", bytes(8 * count))
+        for i in range(count):
+            terms[i] = a
+            seen[a >> 3] |= 1 << (a & 7)
+            c = a - n
+            if c < 0 or seen[c >> 3] & (1 << (c & 7)):
+                c = a + n
+                while c >> 3 >= len(seen):
+                    seen.extend(bytes(len(seen)))  # Double the bitset
+            a = c
+            n += 1
+        self.a = a
+        self.n = n
+        return terms
+
+
+def write_sequence(
+    filename,
+    num,
+    fmt="text",
+    checkpoint=None,
+    checkpoint_every=10_000_000,
+    chunk_size=65536,
+):
+    """Write Recaman's sequence to a file.
+
+    Terms are generated and written in blocks of chunk_size. If a
+    checkpoint file is given, the generator state and the length of
+    the output are saved to it every checkpoint_every terms, and a
+    later call with the same arguments resumes from the last
+    checkpoint instead of starting again. The checkpoint is removed
+    once the sequence is complete.
+
+    Args:
+        filename: The file to write.
+        num: The index of the last term to write.
+        fmt: "text" for one decimal term per line, "u64" for
+            unsigned 64-bit little-endian integers or "varint" for
+            unsigned LEB128 variable-length integers.
+        checkpoint: An optional checkpoint filename.
+        checkpoint_every: The number of terms between checkpoints.
+        chunk_size: The number of terms generated at a time.
+
+    Raises:
+        ValueError: If the format is unknown or the checkpoint file
+            is not valid.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+    encode = {"text": _encode_text, "u64": _encode_u64, "varint": _encode_varint}[fmt]
+
+    total = num + 1
+    if checkpoint is not None and os.path.exists(checkpoint):
+        state, offset, written = _load_checkpoint(checkpoint, fmt)
+        f = open(filename, mode="r+b")
+        f.truncate(offset)
+        f.seek(offset)
+    else:
+        state, written = RecamanState(), 0
+        f = open(filename, mode="wb")
+
+    with f:
+        next_checkpoint = written + checkpoint_every
+        while written < total:
+            terms = state.advance(min(chunk_size, total - written))
+            f.write(encode(terms))
+            written += len(terms)
+            if checkpoint is not None and next_checkpoint <= written < total:
+                f.flush()
+                os.fsync(f.fileno())
+                _save_checkpoint(checkpoint, fmt, state, f.tell(), written)
+                next_checkpoint = written + checkpoint_every
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+def read_sequence(filename, fmt="text"):
+    """Read a sequence written by write_sequence().
+
+    Returns:
+        An array('Q') of the terms.
+    """
+    with open(filename, mode="rb") as f:
+        data = f.read()
+    if fmt == "text":
+        return array("Q", map(int, data.split()))
+    if fmt == "u64":
+        terms = array("Q", data)
+        if sys.byteorder == "big":
+            terms.byteswap()
+        return terms
+    if fmt == "varint":
+        return _decode_varint(data)
+    raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+
+
+def _encode_text(terms):
+    return ("\n".join(map(str, terms)) + "\n").encode("ascii")
+
+
+def _encode_u64(terms):
+    if sys.byteorder == "big":
+        terms = array("Q", terms)
+        terms.byteswap()
+    return terms.tobytes()
+
+
+def _encode_varint(terms):
+    data = bytearray()
+    for value in terms:
+        while value > 0x7F:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return data
+
+
+def _decode_varint(data):
+    terms = array("Q")
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            terms.append(value)
+            value = shift = 0
+    return terms
+
+
+def _save_checkpoint(filename, fmt, state, offset, written):
+    """Atomically replace a checkpoint file with the current state."""
+    temporary = os.fspath(filename) + ".tmp"
+    with open(temporary, mode="wb") as f:
+        f.write(
+            _CHECKPOINT.pack(
+                _CHECKPOINT_MAGIC,
+                FORMATS.index(fmt),
+                state.a,
+                state.n,
+                offset,
+                written,
+            )
+        )
+        f.write(state.seen)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, filename)
+
+
+def _load_checkpoint(filename, fmt):
+    """Read a checkpoint file for output in the given format.
+
+    Returns:
+        A tuple of the RecamanState, the output file length and the
+        number of terms written when the checkpoint was taken.
+    """
+    with open(filename, mode="rb") as f:
+        header = f.read(_CHECKPOINT.size)
+        seen = bytearray(f.read())
+    if len(header) < _CHECKPOINT.size or header[:8] != _CHECKPOINT_MAGIC:
+        raise ValueError(f"{filename} is not a Recaman checkpoint file")
+    _, format_index, a, n, offset, written = _CHECKPOINT.unpack(header)
+    if format_index >= len(FORMATS) or FORMATS[format_index] != fmt:
+        raise ValueError(f"{filename} is a checkpoint for a different format")
+    return RecamanState(a, n, seen), offset, written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write Recaman's sequence to a file.")
+    parser.add_argument("filename")
+    parser.add_argument("num", type=int, help="index of the last term to write")
+    parser.add_argument("--format", choices=FORMATS, default="text")
+    parser.add_argument("--checkpoint", help="checkpoint file for resuming a run")
+    parser.add_argument("--checkpoint-every", type=int, default=10_000_000)
+    args = parser.parse_args(argv)
+    write_sequence(
+        args.filename,
+        args.num,
+        fmt=args.format,
+        checkpoint=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+    )
 
 
 if __name__ == "__main__":
-    write_sequence(filename=sys.argv[1], num=int(sys.argv[2]))
+    main()
@@ -1,4 +1,16 @@
+import math
+import operator
 import sys
+from decimal import Context, Decimal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for sqrt_array()
+    np = None
+
+# Adding this to half the bits of a positive double approximately halves
+# its exponent, giving a first guess within about 6% of the square root
+_SQRT_MAGIC = 0x1FF8000000000000
 
 
 def sqrt(x):
@@ -26,6 +38,134 @@ def sqrt(x):
     return guess
 
 
+def sqrt_array(values, rtol=1e-15, max_iter=64):
+    """Compute many square roots at once using the method
+    of Heron of Alexandria.
+
+    Each Heron step is applied to the whole array. The first guess
+    is made by halving the exponent in the floating point bits, and
+    elements stop being refined as soon as successive guesses agree
+    to within rtol, which usually takes four or five steps.
+
+    Args:
+        values: A sequence or array of non-negative numbers.
+        rtol: The relative change between guesses at which an
+            element counts as converged.
+        max_iter: The maximum number of steps.
+
+    Returns:
+        A float64 array of the square roots, the same shape as values.
+
+    Raises:
+        ValueError: If any value is negative
+        ImportError: If NumPy is not installed.
+    """
+    if np is None:
+        raise ImportError("sqrt_array() requires NumPy")
+
+    x = np.array(values, dtype=np.float64)
+    negative = x < 0
+    if negative.any():
+        value = x[negative].flat[0]
+        raise ValueError(f"Cannot compute square root of negative number {value}")
+
+    # Zero, infinity and NaN are their own square roots
+    result = x.copy()
+    todo = np.flatnonzero(np.isfinite(x) & (x > 0))
+    x = x.ravel()[todo]
+    guess = ((x.view(np.int64) >> 1) + _SQRT_MAGIC).view(np.float64)
+
+    for _ in range(max_iter):
+        if not todo.size:
+            break
+        new_guess = 0.5 * (guess + x / guess)
+        converged = np.abs(new_guess - guess) <= rtol * new_guess
+        result.flat[todo[converged]] = new_guess[converged]
+        active = ~converged
+        todo, x, guess = todo[active], x[active], new_guess[active]
+    result.flat[todo] = guess
+    return result
+
+
+def isqrt(n):
+    """Compute the exact integer square root using Newton's method.
+
+    The first guess comes from the square root of the top half of the
+    bits of n, so the number of Newton steps needed grows only with
+    the logarithm of the size of n.
+
+    Args:
+        n: A non-negative integer.
+
+    Returns:
+        The largest integer whose square is at most n.
+
+    Raises:
+        ValueError: If n is negative
+    """
+    n = operator.index(n)
+    if n < 0:
+        raise ValueError(f"Cannot compute square root of negative number {n}")
+    if n == 0:
+        return 0
+    if n < 1 << 52:
+        # Floats represent these exactly, and the root is out by at most one
+        guess = int(math.sqrt(n)) + 1
+    else:
+        # Twice as many correct bits as the root of the top half
+        shift = (n.bit_length() - 1) // 4
+        guess = (isqrt(n >> 2 * shift) + 1) << shift
+
+    # Starting above the root, Newton's method decreases to it
+    while True:
+        better = (guess + n // guess) // 2
+        if better >= guess:
+            return guess
+        guess = better
+
+
+def sqrt_decimal(x, digits=28):
+    """Compute a square root to a requested number of digits.
+
+    Args:
+        x: A non-negative number, as an int, str, float or Decimal.
+        digits: The number of significant digits in the result.
+
+    Returns:
+        A Decimal of the square root, rounded to digits significant
+        digits.
+
+    Raises:
+        ValueError: If x is negative
+    """
+    x = Decimal(x)
+    if x < 0:
+        raise ValueError(f"Cannot compute square root of negative number {x}")
+    if not x or not x.is_finite():
+        return x
+
+    # Scale x by an even power of ten to an integer with enough digits
+    # for the root to have two guard digits, then take its integer root
+    sign, coefficient_digits, exponent = x.as_tuple()
+    exact = Context(prec=len(coefficient_digits) + digits + 2)
+    coefficient = int(x.scaleb(-exponent, exact))
+    scale = -(-(2 * (digits + 2) - len(coefficient_digits) - exponent) // 2)
+    power = exponent + 2 * scale
+    if power >= 0:
+        scaled, dropped = coefficient * 10**power, 0
+    else:
+        scaled, dropped = divmod(coefficient, 10**-power)
+    root = isqrt(scaled)
+    if dropped or root * root != scaled:
+        # The true root lies strictly between root and root + 1, so
+        # append a sticky digit to keep the final rounding from taking
+        # a truncated root for an exact tie
+        root, scale = root * 10 + 1, scale + 1
+    root = Decimal(root)
+    root = root.scaleb(-scale, Context(prec=root.adjusted() + 1))
+    return Context(prec=digits).plus(root)
+
+
 def main():
     try:
         print(sqrt(9))
@@ -1,11 +1,387 @@
 """Read and print an integer series."""
 
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import warnings
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up parsing
+    np = None
+
+# Sidecar cache header: magic, source size, source mtime in ns, count
+_CACHE_HEADER = struct.Struct("<8sQQQ")
+_CACHE_MAGIC = b"SERIESQ1"
+_CACHE_SUFFIX = ".q64"
+
+# The size of the blocks of the file which are parsed at a time
+_BLOCK_SIZE = 1 << 20
+
 
 def read_series(filename):
     with open(filename, mode="rt", encoding="utf-8") as f:
         return [int(line.strip()) for line in f]
 
 
-def main(filename):
-    series = read_series(filename)
-    print(series)
+def read_series_array(filename, cache=False):
+    """Read an integer series into a compact array.
+
+    The file is memory-mapped and parsed a large block at a time, and
+    the values are stored unboxed, eight bytes each. Use
+    numpy.frombuffer(result, dtype=numpy.int64) for a NumPy view.
+
+    Args:
+        filename: A text file with one integer per line.
+        cache: If True, keep a binary copy of the values next to the
+            file, and use it instead of parsing on later reads as
+            long as the file's size and modification time match.
+
+    Returns:
+        An array('q') of the values.
+
+    Raises:
+        ValueError: If a line is not an integer. The message gives the
+            line number.
+        OverflowError: If a value does not fit in 64 bits.
+    """
+    if cache:
+        values = _read_cache(filename)
+        if values is not None:
+            return values
+
+    values = array("q")
+    for block_values in _parse_blocks(filename):
+        values.extend(block_values)
+
+    if cache:
+        _write_cache(filename, values)
+    return values
+
+
+def iter_series(filename, chunk_size=65536):
+    """Read an integer series in fixed-size chunks.
+
+    Args:
+        filename: A text file with one integer per line.
+        chunk_size: The number of values in each chunk.
+
+    Yields:
+        array('q') chunks of chunk_size values. The last chunk may be
+        shorter.
+
+    Raises:
+        ValueError: If a line is not an integer. The message gives the
+            line number.
+    """
+    pending = array("q")
+    for block_values in _parse_blocks(filename):
+        pending.extend(block_values)
+        if len(pending) >= chunk_size:
+            full = len(pending) - len(pending) % chunk_size
+            for start in range(0, full, chunk_size):
+                yield pending[start : start + chunk_size]
+            del pending[:full]
+    if pending:
+        yield pending
+
+
+def read_series_parallel(filename, workers=None, directory=None):
+    """Read an integer series using a pool of processes.
+
+    The file is split into byte ranges at line boundaries, and worker
+    processes parse their ranges straight into one memory-mapped
+    temporary file, which the result is a view of. The file is read
+    once: rather than counting the lines first, each range gets room
+    for as many values as it could possibly hold, one per two bytes,
+    and the values are then moved down over the gaps with memmove.
+    That costs a little address space and one pass over the values in
+    memory, which is cheap next to parsing them, and saves a second
+    pass over the text and a copy into an array.
+
+    Args:
+        filename: A text file with one integer per line.
+        workers: The number of worker processes. Defaults to the
+            number of CPUs.
+        directory: The directory for the temporary file, which is
+            deleted at once but holds the values until they are
+            released. Defaults to the system temporary directory. A
+            RAM-backed one, such as /dev/shm, keeps the values from
+            being written back to disk.
+
+    Returns:
+        A memoryview of format "q" of the values. It owns the memory
+        mapping holding them, which is unmapped when the view is
+        released or garbage collected, so use it in a with statement
+        to free the memory promptly. Use array("q", result) for a copy
+        as read_series_array() returns.
+
+    Raises:
+        ValueError: If a line is not an integer. The message gives the
+            line number, and if there are several bad lines it is
+            the first of them.
+        OverflowError: If a value does not fit in 64 bits.
+    """
+    workers = workers or os.cpu_count() or 1
+    filename = os.fspath(filename)
+    ranges = _line_ranges(filename, 4 * workers)
+    if not ranges:
+        return memoryview(array("q"))
+    # Every line but the last ends with a newline and is not blank, so
+    # a range of n bytes holds at most (n + 1) // 2 values
+    offsets = list(
+        accumulate((8 * ((stop - start + 1) // 2) for start, stop in ranges), initial=0)
+    )
+
+    fd, path = tempfile.mkstemp(suffix=_CACHE_SUFFIX, dir=directory)
+    try:
+        os.ftruncate(fd, offsets[-1])
+        counts = _parse_ranges_into(path, filename, ranges, offsets, workers)
+        mapping = mmap.mmap(fd, offsets[-1])
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+    total = 0
+    for offset, count in zip(offsets, counts):
+        mapping.move(8 * total, offset, 8 * count)
+        total += count
+    mapping.resize(8 * total)  # Frees the pages past the values
+    return memoryview(mapping).cast("q")
+
+
+def _parse_ranges_into(path, filename, ranges, offsets, workers):
+    """Parse byte ranges of a file into a values file in parallel.
+
+    Returns:
+        A list of the number of values in each range.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_parse_range_into, path, filename, start, stop, offset)
+            for (start, stop), offset in zip(ranges, offsets)
+        ]
+        try:
+            counts = []
+            for (start, stop), future in zip(ranges, futures):
+                try:
+                    counts.append(future.result())
+                except ValueError:
+                    # The worker numbered the lines from the start of its
+                    # range, so parse it again here to number them from
+                    # the start of the file
+                    for _ in _parse_blocks(filename, start, stop, 1 + sum(counts)):
+                        pass
+                    raise
+            return counts
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _line_ranges(filename, count):
+    """Split a file into about count byte ranges of whole lines."""
+    with open(filename, mode="rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            starts = [0]
+            for i in range(1, count):
+                end = data.find(b"\n", max(starts[-1], size * i // count))
+                if end == -1:
+                    break
+                if end + 1 < size:
+                    starts.append(end + 1)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def _parse_range_into(path, filename, start, stop, offset):
+    """Worker task: parse a byte range of a file into a values file.
+
+    Returns:
+        The number of values, written from offset onwards.
+    """
+    with open(path, mode="r+b") as f:
+        with mmap.mmap(f.fileno(), 0) as output:
+            position = offset
+            for values in _parse_blocks(filename, start, stop):
+                size = 8 * len(values)
+                output[position : position + size] = values
+                position += size
+    return (position - offset) // 8
+
+
+def summarize_series(filename):
+    """Compute summary statistics of a series without loading it all.
+
+    Returns:
+        A tuple of the count, minimum, maximum and sum of the values.
+        The minimum and maximum are None for an empty series.
+    """
+    count = total = 0
+    minimum = maximum = None
+    for chunk in iter_series(filename):
+        count += len(chunk)
+        total += sum(chunk)
+        low, high = min(chunk), max(chunk)
+        minimum = low if minimum is None else min(minimum, low)
+        maximum = high if maximum is None else max(maximum, high)
+    return count, minimum, maximum, total
+
+
+def _parse_blocks(filename, start=0, stop=None, first_line=1):
+    """Parse a series file a block of whole lines at a time.
+
+    Args:
+        filename: A text file with one integer per line.
+        start: The offset of the first byte to parse, at a line start.
+        stop: The offset after the last byte to parse, at a line
+            start or the end of the file. Defaults to the end.
+        first_line: The line number of the line at start.
+
+    Yields:
+        An array('q') for each block.
+    """
+    with open(filename, mode="rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        stop = size if stop is None else stop
+        if start >= stop:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while start < stop:
+                end = data.find(b"\n", min(start + _BLOCK_SIZE, stop) - 1, stop)
+                end = stop if end == -1 else end + 1
+                block = data[start:end]
+                yield _parse_lines(block, filename, first_line)
+                first_line += block.count(b"\n")
+                start = end
+
+
+def _parse_lines(block, filename, first_line):
+    """Parse a block of whole lines into an array('q').
+
+    Args:
+        block: The bytes of the lines.
+        filename: The name of the file, for error messages.
+        first_line: The line number of the first line in the block.
+    """
+    if np is not None:
+        values = _parse_lines_numpy(block)
+        if values is not None:
+            return values
+
+    lines = block.split(b"\n")
+    if not lines[-1]:
+        del lines[-1]  # The block ended with a newline
+    try:
+        return array("q", map(int, lines))
+    except ValueError:
+        pass
+    # Find the bad line and report it as int() would, with its number
+    for number, line in enumerate(lines, start=first_line):
+        try:
+            int(line)
+        except ValueError as error:
+            text = line.decode("utf-8", errors="replace")
+            try:
+                int(text)
+            except ValueError as text_error:
+                error = text_error
+            raise ValueError(f"{filename}, line {number}: {error}") from None
+    raise AssertionError("No bad line found")
+
+
+def _parse_lines_numpy(block):
+    """Parse a block of simple integer lines with NumPy's C parser.
+
+    NumPy is more lenient than int() - it skips blank lines, reads a
+    lone "-" as zero and saturates values which overflow - so it is
+    only trusted for blocks of plain digits and minus signs which it
+    parses into exactly one value per line, with no saturated values.
+
+    Returns:
+        An array('q') of the values, or None if the block must be
+        parsed by int() instead.
+    """
+    if block.translate(None, b"0123456789-\n"):
+        return None
+    if block.startswith(b"\n") or b"\n\n" in block:
+        return None  # Blank lines
+    if block.endswith(b"-") or b"-\n" in block:
+        return None  # Lone or trailing minus signs
+    lines = block.count(b"\n") + (not block.endswith(b"\n"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # Partial parses only warn
+        try:
+            parsed = np.fromstring(block, dtype=np.int64, sep="\n")
+        except (ValueError, DeprecationWarning):
+            return None
+    if len(parsed) != lines:
+        return None
+    limits = np.iinfo(np.int64)
+    if len(parsed) and (parsed.max() == limits.max or parsed.min() == limits.min):
+        return None
+    values = array("q")
+    values.frombytes(parsed.tobytes())
+    return values
+
+
+def _cache_filename(filename):
+    return os.fspath(filename) + _CACHE_SUFFIX
+
+
+def _read_cache(filename):
+    """The values from a series file's sidecar cache, or None if stale."""
+    stat = os.stat(filename)
+    try:
+        with open(_cache_filename(filename), mode="rb") as f:
+            header = f.read(_CACHE_HEADER.size)
+            if len(header) < _CACHE_HEADER.size:
+                return None
+            magic, size, mtime, count = _CACHE_HEADER.unpack(header)
+            if (magic, size, mtime) != (_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns):
+                return None
+            values = array("q")
+            values.fromfile(f, count)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _write_cache(filename, values):
+    """Write a sidecar cache of a series file's values."""
+    stat = os.stat(filename)
+    if sys.byteorder == "big":
+        values = array("q", values)
+        values.byteswap()
+    cache_filename = _cache_filename(filename)
+    temporary = cache_filename + ".tmp"
+    with open(temporary, mode="wb") as f:
+        f.write(
+            _CACHE_HEADER.pack(
+                _CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, len(values)
+            )
+        )
+        values.tofile(f)
+    os.replace(temporary, cache_filename)
+
+
+def main(filename, summary=False):
+    if summary:
+        count, minimum, maximum, total = summarize_series(filename)
+        print(f"count={count} min={minimum} max={maximum} sum={total}")
+    else:
+        series = read_series(filename)
+        print(series)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], summary="--summary" in sys.argv[2:])
@@ -0,0 +1,333 @@
+import random
+
+import pytest
+
+import airtravel
+
+
+@pytest.fixture
+def flight():
+    "An empty flight on an Airbus A319, with 22 rows of 6 seats"
+    return airtravel.Flight("BA758", airtravel.AirbusA319("G-EUPT"))
+
+
+def test_make_flights():
+    f, g = airtravel.make_flights()
+    assert f.num_available_seats() == 22 * 6 - 5
+    assert g.num_available_seats() == 55 * 10 - 4
+
+
+@pytest.mark.parametrize(
+    "number, message",
+    [
+        ("758", "No airline code in '758'"),
+        ("ba758", "Invalid airline code 'ba758'"),
+        ("BA75X", "Invalid route number 'BA75X'"),
+        ("BA10000", "Invalid route number 'BA10000'"),
+    ],
+)
+def test_invalid_flight_number(number, message):
+    with pytest.raises(ValueError, match=message):
+        airtravel.Flight(number, airtravel.AirbusA319("G-EUPT"))
+
+
+def test_allocate_seat(flight):
+    flight.allocate_seat("1A", "Ada")
+    flight.allocate_seat("22F", "Grace")
+    assert flight.num_available_seats() == 130
+    with pytest.raises(ValueError, match="Seat 1A already occupied"):
+        flight.allocate_seat("1A", "Linus")
+    assert flight.num_available_seats() == 130
+
+
+@pytest.mark.parametrize(
+    "seat, message",
+    [
+        ("12G", "Invalid seat letter G"),
+        ("XA", "Invalid seat row X"),
+        ("A", "Invalid seat row "),
+        ("0A", "Invalid row number 0"),
+        ("23A", "Invalid row number 23"),
+    ],
+)
+def test_invalid_seat(flight, seat, message):
+    with pytest.raises(ValueError, match=message):
+        flight.allocate_seat(seat, "Ada")
+    assert flight.num_available_seats() == 132
+
+
+def test_relocate_passenger(flight):
+    flight.allocate_seat("3C", "Ada")
+    flight.allocate_seat("3D", "Grace")
+    flight.relocate_passenger("3C", "10B")
+    assert flight.num_available_seats() == 130
+    assert sorted(flight._passenger_seats()) == [("Ada", "10B"), ("Grace", "3D")]
+    with pytest.raises(ValueError, match="No passenger to relocate in seat 3C"):
+        flight.relocate_passenger("3C", "4A")
+    with pytest.raises(ValueError, match="Seat 3D already occupied"):
+        flight.relocate_passenger("10B", "3D")
+
+
+def test_make_boarding_cards():
+    _, g = airtravel.make_flights()
+    cards = []
+    g.make_boarding_cards(lambda *card: cards.append(card))
+    assert cards == [
+        ("Brian Kernighan", "4B", "AF72", "Boeing 777"),
+        ("Dennis Ritchie", "4A", "AF72", "Boeing 777"),
+        ("Larry Wall", "55K", "AF72", "Boeing 777"),
+        ("Yukihiro Matsumoto", "33G", "AF72", "Boeing 777"),
+    ]
+
+
+def test_flight_has_no_instance_dict(flight):
+    with pytest.raises(AttributeError):
+        flight.__dict__
+
+
+def test_non_canonical_seat(flight):
+    flight.allocate_seat("012C", "Ada")
+    assert list(flight._passenger_seats()) == [("Ada", "12C")]
+    with pytest.raises(ValueError, match="Seat 12C already occupied"):
+        flight.allocate_seat("12C", "Grace")
+
+
+def test_seat_table_shared_per_class():
+    a = airtravel.AirbusA319("G-EUPT")
+    b = airtravel.AirbusA319("G-EUPU")
+    assert a.seat_slots() is b.seat_slots()
+    assert a.seat_designators()[:7] == ["1A", "1B", "1C", "1D", "1E", "1F", "2A"]
+    assert a.seat_slots()["22F"] == a.num_seats() - 1
+    boeing = airtravel.Boeing777("F-GSPS")
+    assert boeing.seat_slots()["55K"] == boeing.num_seats() - 1
+
+
+def test_seat_table_for_subclass():
+    class Shortened(airtravel.AirbusA319):
+        def seating_plan(self):
+            return range(1, 3), "ABC"
+
+    airtravel.AirbusA319("G-EUPT").seat_slots()
+    shortened = Shortened("G-EUPV")
+    assert shortened.seat_designators() == ["1A", "1B", "1C", "2A", "2B", "2C"]
+    flight = airtravel.Flight("BA1", shortened)
+    assert flight.num_available_seats() == 6
+    with pytest.raises(ValueError, match="Invalid row number 3"):
+        flight.allocate_seat("3A", "Ada")
+
+
+def test_allocate_seats(flight):
+    flight.allocate_seats([("1A", "Ada"), ("1B", "Grace"), ("012C", "Linus")])
+    assert flight.num_available_seats() == 129
+    assert sorted(flight._passenger_seats()) == [
+        ("Ada", "1A"),
+        ("Grace", "1B"),
+        ("Linus", "12C"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "assignments, message",
+    [
+        ([("2A", "Grace"), ("1A", "Linus")], "Seat 1A already occupied"),
+        ([("2A", "Grace"), ("2A", "Linus")], "Seat 2A assigned more than once"),
+        ([("2A", "Grace"), ("02A", "Linus")], "Seat 02A assigned more than once"),
+        ([("2A", "Grace"), ("2G", "Linus")], "Invalid seat letter G"),
+    ],
+)
+def test_allocate_seats_all_or_nothing(flight, assignments, message):
+    flight.allocate_seat("1A", "Ada")
+    with pytest.raises(ValueError, match=message):
+        flight.allocate_seats(assignments)
+    assert list(flight._passenger_seats()) == [("Ada", "1A")]
+    assert flight.num_available_seats() == 131
+
+
+def test_auto_allocate_seats_by_preference(flight):
+    flight.allocate_seat("1A", "Ada")
+    assignments = flight.auto_allocate_seats(["Grace", "Linus", "Guido"], "FA")
+    assert assignments == [("1F", "Grace"), ("2F", "Linus"), ("3F", "Guido")]
+    flight.allocate_seats((f"{row}F", f"Passenger {row}") for row in range(4, 23))
+    assignments = flight.auto_allocate_seats(["Bjarne", "Rich"], "F")
+    assert assignments == [("2A", "Bjarne"), ("3A", "Rich")]
+
+
+def test_auto_allocate_seats_default_order(flight):
+    assignments = flight.auto_allocate_seats(["Ada", "Grace"])
+    assert assignments == [("1A", "Ada"), ("2A", "Grace")]
+
+
+def test_auto_allocate_seats_full(flight):
+    flight.auto_allocate_seats([f"Passenger {i}" for i in range(130)])
+    with pytest.raises(ValueError, match="Only 2 seats free for 3 passengers"):
+        flight.auto_allocate_seats(["Ada", "Grace", "Linus"])
+    assert flight.num_available_seats() == 2
+    with pytest.raises(ValueError, match="Invalid seat letter Z"):
+        flight.auto_allocate_seats(["Ada"], "Z")
+
+
+def test_auto_allocate_seats_together(flight):
+    flight.allocate_seats([("1C", "Ada"), ("2A", "Grace")])
+    assignments = flight.auto_allocate_seats(["Linus", "Guido", "Rich"], together=True)
+    assert assignments == [("1D", "Linus"), ("1E", "Guido"), ("1F", "Rich")]
+    assignments = flight.auto_allocate_seats(["A", "B", "C", "D", "E"], together=True)
+    assert [seat for seat, _ in assignments] == ["2B", "2C", "2D", "2E", "2F"]
+    with pytest.raises(ValueError, match="No block of 7 adjacent free seats in a row"):
+        flight.auto_allocate_seats(list("ABCDEFG"), together=True)
+    assert flight.auto_allocate_seats([], together=True) == []
+
+
+def test_release_seat(flight):
+    flight.allocate_seat("5C", "Ada")
+    assert flight.release_seat("5C") == "Ada"
+    assert flight.num_available_seats() == 132
+    flight.allocate_seat("5C", "Grace")
+    with pytest.raises(ValueError, match="No passenger in seat 6C"):
+        flight.release_seat("6C")
+    with pytest.raises(ValueError, match="Invalid seat letter Z"):
+        flight.release_seat("6Z")
+
+
+def test_find_adjacent_seats(flight):
+    flight.allocate_seats([("1D", "Ada"), ("2B", "Grace"), ("2E", "Linus")])
+    # Row 1 has runs ABC and EF, row 2 has runs A, CD and F
+    assert flight.find_adjacent_seats(2) == ["1A", "1B"]
+    assert flight.find_adjacent_seats(2, best=True) == ["2C", "2D"]
+    assert flight.find_adjacent_seats(3, best=True) == ["1A", "1B", "1C"]
+    assert flight.find_adjacent_seats(1, best=True) == ["2A"]
+    assert flight.find_adjacent_seats(6) == ["3A", "3B", "3C", "3D", "3E", "3F"]
+    assert flight.find_adjacent_seats(7) is None
+
+
+def test_find_window_seat(flight):
+    assert flight.find_window_seat() == "1A"
+    flight.allocate_seat("1A", "Ada")
+    assert flight.find_window_seat() == "1F"
+    flight.auto_allocate_seats([f"Passenger {i}" for i in range(43)], "AF")
+    assert flight.find_window_seat() is None
+    flight.release_seat("17F")
+    assert flight.find_window_seat() == "17F"
+
+
+def test_num_available_in_row(flight):
+    flight.allocate_seats([("3A", "Ada"), ("3F", "Grace")])
+    assert flight.num_available_in_row(3) == 4
+    assert flight.num_available_in_row(4) == 6
+    with pytest.raises(ValueError, match="Invalid row number 23"):
+        flight.num_available_in_row(23)
+
+
+def test_free_seat_index_under_random_workload():
+    flight = airtravel.Flight("AF72", airtravel.Boeing777("F-GSPS"))
+    seats = flight._aircraft.seat_designators()
+    rng = random.Random(24)
+    taken = {}
+    for step in range(3000):
+        seat = rng.choice(seats)
+        if seat in taken:
+            if rng.random() < 0.5:
+                assert flight.release_seat(seat) == taken.pop(seat)
+            else:
+                free = [s for s in seats if s not in taken]
+                to_seat = rng.choice(free)
+                flight.relocate_passenger(seat, to_seat)
+                taken[to_seat] = taken.pop(seat)
+        else:
+            flight.allocate_seat(seat, step)
+            taken[seat] = step
+
+        count = rng.randint(1, 10)
+        expected = None
+        for start in range(0, len(seats), 10):
+            for offset in range(10 - count + 1):
+                block = seats[start + offset : start + offset + count]
+                if not any(s in taken for s in block):
+                    expected = block
+                    break
+            if expected:
+                break
+        assert flight.find_adjacent_seats(count) == expected
+        best = flight.find_adjacent_seats(count, best=True)
+        assert (best is None) == (expected is None)
+        if best:
+            assert not any(s in taken for s in best)
+
+    assert sorted(flight._passenger_seats()) == sorted(
+        (passenger, seat) for seat, passenger in taken.items()
+    )
+    cards = []
+    flight.make_boarding_cards(
+        lambda passenger, seat, *_: cards.append((passenger, seat))
+    )
+    assert cards == sorted((passenger, seat) for seat, passenger in taken.items())
+    for seat, passenger in taken.items():
+        assert flight.seat_of(passenger) == seat
+
+    windows = [s for s in seats if s[-1] in "AK" and s not in taken]
+    assert flight.find_window_seat() == (
+        min(windows, key=seats.index) if windows else None
+    )
+    assert flight.num_available_seats() == len(seats) - len(taken)
+
+
+def test_seat_of(flight):
+    flight.allocate_seat("012C", "Ada")
+    flight.allocate_seats([("3A", "Grace"), ("2B", "Linus")])
+    assert flight.seat_of("Ada") == "12C"
+    assert flight.seat_of("Linus") == "2B"
+    flight.relocate_passenger("2B", "20F")
+    assert flight.seat_of("Linus") == "20F"
+    flight.release_seat("3A")
+    with pytest.raises(ValueError, match="No seat for passenger Grace"):
+        flight.seat_of("Grace")
+    with pytest.raises(ValueError, match="No seat for passenger Ad"):
+        flight.seat_of("Ad")
+
+
+def test_seat_of_shared_name(flight):
+    flight.allocate_seats([("9A", "Ada"), ("10A", "Ada")])
+    assert flight.seat_of("Ada") == "10A"
+    flight.release_seat("10A")
+    assert flight.seat_of("Ada") == "9A"
+
+
+def test_boarding_cards_follow_changes(flight):
+    flight.auto_allocate_seats(["Linus", "Ada", "Grace"], together=True)
+    flight.relocate_passenger("1A", "22F")
+    flight.release_seat("1B")
+    cards = []
+    flight.make_boarding_cards(
+        lambda passenger, seat, *_: cards.append((passenger, seat))
+    )
+    assert cards == [("Grace", "1C"), ("Linus", "22F")]
+
+
+def test_unorderable_passengers_are_seated(flight):
+    flight.allocate_seat("1A", "Ada")
+    flight.allocate_seats([("2A", "Grace"), ("3A", 7)])
+    assert flight.seat_of(7) == "3A"
+    assert flight.num_available_seats() == 129
+    with pytest.raises(TypeError):
+        flight.make_boarding_cards(lambda *card: None)
+
+
+def test_unhashable_batch_changes_nothing(flight):
+    flight.allocate_seat("1A", "Ada")
+    with pytest.raises(TypeError):
+        flight.allocate_seats([("2A", "Grace"), ("3A", ["Linus"])])
+    assert list(flight._passenger_seats()) == [("Ada", "1A")]
+    assert flight.num_available_seats() == 131
+
+
+def test_none_passenger_leaves_seat_free(flight):
+    flight.allocate_seat("1A", None)
+    flight.allocate_seats([("2A", None), ("3A", "Ada")])
+    assert flight.num_available_seats() == 131
+    assert flight.find_window_seat() == "1A"
+    assert flight.num_available_in_row(2) == 6
+    flight.allocate_seats([("1A", "Grace"), ("2A", "Linus")])
+    cards = []
+    flight.make_boarding_cards(
+        lambda passenger, seat, *_: cards.append((passenger, seat))
+    )
+    assert cards == [("Ada", "3A"), ("Grace", "1A"), ("Linus", "2A")]
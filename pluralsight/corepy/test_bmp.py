@@ -0,0 +1,180 @@
+from array import array
+
+import pytest
+
+import bmp
+
+PIXELS = [[(x * y + y) % 256 for x in range(13)] for y in range(7)]
+
+
+@pytest.fixture
+def reference(tmp_path):
+    "Provides the bytes written by write_grayscale for PIXELS"
+    filename = tmp_path / "reference.bmp"
+    bmp.write_grayscale(filename, PIXELS)
+    return filename.read_bytes()
+
+
+@pytest.mark.parametrize(
+    "convert",
+    [
+        list,
+        bytes,
+        bytearray,
+        lambda row: array("B", row),
+        lambda row: memoryview(bytes(row)),
+    ],
+)
+def test_streamed_rows_match_write_grayscale(tmp_path, reference, convert):
+    filename = tmp_path / "streamed.bmp"
+    bmp.write_grayscale_rows(filename, 13, 7, (convert(row) for row in PIXELS))
+    assert filename.read_bytes() == reference
+
+
+def test_reference_layout(reference):
+    assert reference[:2] == b"BM"
+    assert int.from_bytes(reference[2:6], "little") == len(reference)
+    assert int.from_bytes(reference[10:14], "little") == 14 + 40 + 1024
+    assert reference[54:62] == bytes((0, 0, 0, 0, 1, 1, 1, 0))
+    assert len(reference) == 1078 + 16 * 7
+
+
+def test_write_grayscale_many(tmp_path, reference):
+    filenames = [tmp_path / f"{i}.bmp" for i in range(3)]
+    assert bmp.write_grayscale_many((name, PIXELS) for name in filenames) == 3
+    assert all(name.read_bytes() == reference for name in filenames)
+
+
+@pytest.mark.parametrize("width", [12, 13])
+def test_write_grayscale_many_reuses_buffers_safely(tmp_path, width):
+    images = [
+        [[(x + y + i) % 256 for x in range(width)] for y in range(5)] for i in range(3)
+    ]
+    images.insert(1, [[255] * 4 for _ in range(4)])
+    names = [tmp_path / f"{i}.bmp" for i in range(len(images))]
+    assert bmp.write_grayscale_many(zip(names, images)) == len(images)
+    for name, pixels in zip(names, images):
+        expected = tmp_path / "expected.bmp"
+        bmp.write_grayscale(expected, pixels)
+        assert name.read_bytes() == expected.read_bytes()
+
+
+def test_write_grayscale_many_rejects_ragged_rows(tmp_path):
+    with pytest.raises(ValueError):
+        bmp.write_grayscale_many([(tmp_path / "ragged.bmp", [[1, 2, 3, 4], [1, 2]])])
+
+
+def test_write_grayscale_rejects_ragged_rows(tmp_path):
+    with pytest.raises(ValueError):
+        bmp.write_grayscale(tmp_path / "ragged.bmp", [[1, 2, 3], [1, 2]])
+
+
+def test_streamed_rows_are_checked(tmp_path):
+    filename = tmp_path / "bad.bmp"
+    with pytest.raises(ValueError):
+        bmp.write_grayscale_rows(filename, 13, 8, iter(PIXELS))
+    with pytest.raises(ValueError):
+        bmp.write_grayscale_rows(filename, 13, 6, iter(PIXELS))
+    with pytest.raises(ValueError):
+        bmp.write_grayscale_rows(filename, 12, 7, iter(PIXELS))
+    with pytest.raises(ValueError):
+        bmp.write_grayscale_rows(filename, 1, 1, [[256]])
+
+
+def _decode_rle8(data, width, height):
+    "Decodes BI_RLE8 pixel data into rows, top to bottom"
+    rows, row, i = [], [], 0
+    while True:
+        count, value = data[i], data[i + 1]
+        i += 2
+        if count:
+            row += [value] * count
+        elif value == 0:
+            rows.append(row)
+            row = []
+        elif value == 1:
+            break
+        else:
+            row += list(data[i : i + value])
+            i += value + value % 2
+    assert len(rows) == height
+    assert all(len(row) == width for row in rows)
+    return rows[::-1]
+
+
+def test_write_rle8(tmp_path):
+    pixels = [
+        [0] * 300,
+        list(range(256)) + [7] * 44,
+        [1, 2, 2, 3, 4, 5, 5, 5, 6, 9] * 30,
+    ]
+    filename = tmp_path / "image.bmp"
+    bmp.write_rle8(filename, pixels)
+    with bmp.Bitmap(filename) as bitmap:
+        assert (bitmap.width, bitmap.height) == (300, 3)
+        assert bitmap.compression == bmp.BI_RLE8
+        offset = bitmap.pixel_offset
+    data = filename.read_bytes()
+    assert int.from_bytes(data[2:6], "little") == len(data)
+    assert _decode_rle8(data[offset:], 300, 3) == pixels
+
+
+def test_write_color(tmp_path):
+    palette = [(c, 255 - c, c // 2) for c in range(256)]
+    filename = tmp_path / "image.bmp"
+    bmp.write_color(filename, PIXELS, palette)
+    with bmp.Bitmap(filename) as bitmap:
+        assert bitmap.bits_per_pixel == 24
+        assert bitmap.stride == 40
+        row = bitmap.row(2)
+        expected = [c for value in PIXELS[2] for c in reversed(palette[value])]
+        assert row.tolist() == expected
+        row.release()
+
+
+def test_write_color_rejects_values_outside_palette(tmp_path):
+    with pytest.raises(ValueError):
+        bmp.write_color(tmp_path / "image.bmp", [[0, 1, 2]], [(0, 0, 0), (1, 1, 1)])
+
+
+def test_bitmap_header(tmp_path, reference):
+    filename = tmp_path / "image.bmp"
+    filename.write_bytes(reference)
+    with bmp.Bitmap(filename) as bitmap:
+        assert (bitmap.width, bitmap.height) == bmp.dimensions(filename)
+        assert bitmap.bits_per_pixel == 8
+        assert bitmap.stride == 16
+        assert not bitmap.top_down
+        assert bitmap.palette() == [(c, c, c) for c in range(256)]
+
+
+def test_bitmap_rows(tmp_path, reference):
+    filename = tmp_path / "image.bmp"
+    filename.write_bytes(reference)
+    with bmp.Bitmap(filename) as bitmap:
+        rows = [bitmap.row(y) for y in range(bitmap.height)]
+        assert [row.tolist() for row in rows] == PIXELS
+        for row in rows:
+            row.release()
+        with pytest.raises(IndexError):
+            bitmap.row(7)
+
+
+def test_bitmap_pixels_are_a_view(tmp_path, reference):
+    np = pytest.importorskip("numpy")
+    filename = tmp_path / "image.bmp"
+    filename.write_bytes(reference)
+    with bmp.Bitmap(filename) as bitmap:
+        pixels = bitmap.pixels()
+        assert pixels.tolist() == PIXELS
+        assert not pixels.flags.owndata
+        crop = bitmap.crop(2, 1, 5, 3)
+        assert np.array_equal(crop, np.array(PIXELS)[1:3, 2:5])
+        del pixels, crop
+
+
+def test_bitmap_rejects_other_files(tmp_path):
+    filename = tmp_path / "image.bmp"
+    filename.write_bytes(b"GIF89a" + bytes(100))
+    with pytest.raises(ValueError):
+        bmp.Bitmap(filename)
@@ -0,0 +1,90 @@
+import pytest
+
+import fractal
+
+
+def test_mandel_fast_matches_mandel():
+    assert fractal.mandelbrot_fast(70, 40) == fractal.mandelbrot(70, 40)
+
+
+def test_subdivided_image_is_close_to_mandelbrot():
+    image = fractal.mandelbrot_fast(70, 40, subdivide=True)
+    expected = fractal.mandelbrot(70, 40)
+    mismatched = sum(
+        a != b
+        for row, expected_row in zip(image, expected)
+        for a, b in zip(row, expected_row)
+    )
+    assert mismatched <= 0.01 * 70 * 40
+
+
+@pytest.mark.parametrize("size_x, size_y", [(1, 1), (7, 5), (64, 48), (35, 20)])
+def test_array_engine_matches_python_engine(size_x, size_y):
+    np = pytest.importorskip("numpy")
+    image = fractal.mandelbrot_array(size_x, size_y)
+    assert image.dtype == np.uint8
+    assert image.shape == (size_y, size_x)
+    assert image.flags["C_CONTIGUOUS"]
+    assert image.tolist() == fractal.mandelbrot(size_x, size_y)
+
+
+@pytest.mark.parametrize("band_height", [None, 1, 7, 1000])
+def test_parallel_engine_matches_array_engine(band_height):
+    np = pytest.importorskip("numpy")
+    image = fractal.mandelbrot_parallel(45, 30, workers=2, band_height=band_height)
+    assert np.array_equal(image, fractal.mandelbrot_array(45, 30))
+
+
+def test_bands_are_streamed_top_to_bottom():
+    np = pytest.importorskip("numpy")
+    bands = list(fractal.iter_mandelbrot_bands(20, 13, workers=2, band_height=4))
+    assert [first_row for first_row, _ in bands] == [0, 4, 8, 12]
+    assert np.array_equal(
+        np.vstack([band for _, band in bands]), fractal.mandelbrot_array(20, 13)
+    )
+
+
+def test_interior_checks_do_not_change_counts():
+    np = pytest.importorskip("numpy")
+    c_real = np.tile(3.5 * np.arange(70) / 70 - 2.5, 40)
+    c_imag = np.repeat(2.0 * np.arange(40) / 40 - 1.0, 70)
+    assert np.array_equal(
+        fractal._escape_counts(c_real, c_imag, interior_checks=True),
+        fractal._escape_counts(c_real, c_imag),
+    )
+
+
+def test_default_viewport_levels_match_mandel():
+    pytest.importorskip("numpy")
+    viewport = fractal.Viewport(-0.75 + 0.1j, 0.01, width=30, height=20)
+    column, row = viewport.origin()
+    image = fractal.Renderer().render(viewport)
+    assert image[5, 7] == fractal.mandel((column + 7) * 0.01, (row + 5) * 0.01)
+
+
+@pytest.mark.parametrize(
+    "move",
+    [
+        lambda v: v.panned(5, -3),
+        lambda v: v.zoomed(2),
+        lambda v: v.zoomed(4, -0.6 + 0.2j),
+        lambda v: v.zoomed(0.5),
+        lambda v: v.zoomed(3),
+        lambda v: fractal.Viewport(v.center, v.scale, 512, v.width, v.height),
+        lambda v: fractal.Viewport(v.center, v.scale, 64, v.width, v.height),
+    ],
+)
+def test_renderer_reuse_matches_fresh_render(move):
+    np = pytest.importorskip("numpy")
+    viewport = fractal.Viewport(-0.75, 0.02, width=60, height=40)
+    renderer = fractal.Renderer()
+    renderer.render(viewport)
+    moved = move(viewport)
+    assert np.array_equal(renderer.render(moved), fractal.Renderer().render(moved))
+
+
+def test_viewport_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        fractal.Viewport(0, 0)
+    with pytest.raises(ValueError):
+        fractal.Viewport(0, 0.01, max_iter=1)
@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+
+import pytest
+
+import generators
+
+
+@pytest.fixture
+def stream():
+    "A reproducible stream of integers with many duplicates"
+    rng = random.Random(18)
+    return [rng.randrange(2000) for _ in range(10_000)]
+
+
+def unique(items):
+    return list(dict.fromkeys(items))
+
+
+def test_take():
+    assert list(generators.take(3, [3, 6, 2, 1])) == [3, 6, 2]
+
+
+def test_distinct():
+    assert list(generators.distinct([3, 6, 6, 2, 1, 1])) == [3, 6, 2, 1]
+
+
+@pytest.mark.parametrize("max_items", [1, 7, 1_000_000])
+def test_distinct_spilled(tmp_path, stream, max_items):
+    items = stream[:3000] if max_items == 1 else stream
+    spilled = generators.distinct_spilled(items, max_items, directory=tmp_path)
+    assert list(spilled) == unique(items)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_distinct_spilled_tuples(tmp_path):
+    items = [("a", 1), ("b", 2), ("a", 1), ("c", 3), ("b", 2)]
+    assert list(generators.distinct_spilled(items, 2, directory=tmp_path)) == [
+        ("a", 1),
+        ("b", 2),
+        ("c", 3),
+    ]
+
+
+def test_distinct_spilled_closed_early(tmp_path, stream):
+    spilled = generators.distinct_spilled(stream, 10, directory=tmp_path)
+    assert len(list(generators.take(100, spilled))) == 100
+    spilled.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_distinct_approximate(stream):
+    expected = unique(stream)
+    result = list(generators.distinct_approximate(stream, len(expected), 0.01))
+    assert len(result) == len(set(result))
+    assert set(result) <= set(expected)
+    assert len(result) >= 0.97 * len(expected)
+
+
+def test_bloom_filter_error_rate():
+    bloom = generators.BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(i)
+    assert all(i in bloom for i in range(10_000))
+    false_positives = sum(i in bloom for i in range(10_000, 110_000))
+    assert false_positives < 2000
+    assert bloom.nbytes < 12_000
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1)])
+def test_bloom_filter_invalid(capacity, error_rate):
+    with pytest.raises(ValueError):
+        generators.BloomFilter(capacity, error_rate)
+
+
+def test_distinct_window():
+    items = [1, 2, 3, 1, 4, 2, 5, 5, 1, 6, 7, 8, 1]
+    assert list(generators.distinct_window(items, 3)) == [
+        1,
+        2,
+        3,
+        4,
+        2,
+        5,
+        1,
+        6,
+        7,
+        8,
+        1,
+    ]
+
+
+def test_distinct_window_large_matches_distinct(stream):
+    assert list(generators.distinct_window(stream, 10_000)) == unique(stream)
+
+
+def test_distinct_window_invalid():
+    with pytest.raises(ValueError):
+        list(generators.distinct_window([1], 0))
+
+
+def test_chunks():
+    assert list(generators.chunks(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(generators.chunks([], 3)) == []
+    with pytest.raises(ValueError):
+        list(generators.chunks([1], 0))
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+def test_chunked_stages_match_item_stages(stream, size):
+    def chunked(stage, *args):
+        return list(generators.unchunk(stage(*args, generators.chunks(stream, size))))
+
+    assert chunked(generators.distinct_chunks) == list(generators.distinct(stream))
+    assert chunked(generators.take_chunks, 10) == list(generators.take(10, stream))
+    assert chunked(generators.take_chunks, 0) == []
+    assert chunked(generators.map_chunks, str) == list(map(str, stream))
+    is_even = lambda item: item % 2 == 0
+    assert chunked(generators.filter_chunks, is_even) == list(filter(is_even, stream))
+
+
+def test_take_chunks_stops_pulling():
+    source = iter([[1, 2], [3, 4], [5, 6]])
+    assert list(generators.take_chunks(4, source)) == [[1, 2], [3, 4]]
+    assert next(source) == [5, 6]
+
+
+def test_pipeline_stats(stream):
+    pipeline = generators.Pipeline(
+        generators.distinct_chunks,
+        functools.partial(generators.filter_chunks, lambda item: item % 2 == 0),
+        functools.partial(generators.take_chunks, 100),
+    )
+    expected = list(
+        generators.take(
+            100, (item for item in generators.distinct(stream) if item % 2 == 0)
+        )
+    )
+    assert list(pipeline.run(stream, chunk_size=64)) == expected
+    names = [name for name, _, _, _ in pipeline.stats()]
+    assert names == ["chunks", "distinct_chunks", "filter_chunks", "take_chunks"]
+    counts = [items for _, _, items, _ in pipeline.stats()]
+    assert counts[-1] == 100
+    assert counts[0] < len(stream)
+    assert all(seconds >= 0 for _, _, _, seconds in pipeline.stats())
+    assert "take_chunks" in pipeline.report()
+
+
+def test_take_stops_pulling():
+    source = iter(range(10))
+    assert list(generators.take(3, source)) == [0, 1, 2]
+    assert next(source) == 3
+    assert list(generators.take(0, source)) == []
+    assert next(source) == 4
+
+
+class Source:
+    "An iterable of integers which records how many have been pulled"
+
+    def __init__(self, count):
+        self.pulled = 0
+        self._count = count
+
+    def __iter__(self):
+        for item in range(self._count):
+            self.pulled += 1
+            yield item
+
+
+def slow_double(item):
+    time.sleep(0.002 * (item % 3))
+    return item * 2
+
+
+async def async_double(item):
+    await asyncio.sleep(0.002 * (item % 3))
+    return item * 2
+
+
+@pytest.fixture(params=["thread", "async"])
+def make_stage(request):
+    "Makes a stage doubling items, in a thread pool or on an event loop"
+    if request.param == "thread":
+        return functools.partial(generators.thread_stage, slow_double)
+    return functools.partial(generators.async_stage, async_double)
+
+
+def test_stage_ordered(make_stage):
+    assert list(make_stage(range(50), max_pending=8)) == [i * 2 for i in range(50)]
+
+
+def test_stage_unordered(make_stage):
+    results = list(make_stage(range(50), max_pending=8, ordered=False))
+    assert sorted(results) == [i * 2 for i in range(50)]
+
+
+def test_stage_backpressure(make_stage):
+    source = Source(1000)
+    stage = make_stage(source, max_pending=5)
+    for consumed in range(1, 20):
+        next(stage)
+        assert source.pulled <= consumed + 5
+    stage.cancel()
+
+
+def test_take_cancels_stages(make_stage):
+    source = Source(1000)
+    inner = make_stage(source, max_pending=4)
+    outer = generators.thread_stage(abs, inner, workers=2)
+    assert list(generators.take(10, outer)) == [i * 2 for i in range(10)]
+    pulled = source.pulled
+    assert pulled <= 10 + 4 + 4
+    assert list(inner) == []
+    assert source.pulled == pulled
+
+
+@pytest.mark.parametrize(
+    "wrap",
+    [generators.distinct, functools.partial(map, abs)],
+    ids=["distinct", "map"],
+)
+def test_take_cancels_wrapped_stages(make_stage, wrap):
+    threads = set(threading.enumerate())
+    source = Source(1000)
+    stage = wrap(make_stage(source, max_pending=4))
+    assert list(generators.take(10, stage)) == [i * 2 for i in range(10)]
+    del stage
+    assert source.pulled <= 10 + 4
+    for thread in set(threading.enumerate()) - threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+def test_take_leaves_generators_open():
+    source = (i for i in range(10))
+    assert list(generators.take(0, source)) == []
+    assert list(generators.take(3, source)) == [0, 1, 2]
+    assert list(source) == list(range(3, 10))
+
+
+def test_stage_close():
+    stage = generators.thread_stage(abs, range(-100, 0), max_pending=4)
+    assert next(stage) == 100
+    stage.close()
+    assert list(stage) == []
+
+
+def test_stage_error_propagates():
+    def failing(item):
+        if item == 3:
+            raise KeyError(item)
+        return item
+
+    stage = generators.thread_stage(failing, range(10))
+    with pytest.raises(KeyError):
+        list(stage)
+    assert list(stage) == []
+
+
+def test_stage_invalid_max_pending():
+    with pytest.raises(ValueError):
+        generators.thread_stage(abs, [], max_pending=-1)
+
+
+def test_process_stage():
+    stage = generators.process_stage(abs, range(-20, 20), workers=2)
+    assert list(stage) == [abs(i) for i in range(-20, 20)]
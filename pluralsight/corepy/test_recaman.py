@@ -0,0 +1,93 @@
+import os
+import pathlib
+from array import array
+from itertools import islice
+
+import pytest
+
+import recaman
+
+TERMS = 100_000
+
+
+@pytest.fixture(scope="module")
+def expected():
+    "Provides the first TERMS terms from the set-based generator"
+    return list(islice(recaman.sequence(), TERMS))
+
+
+def test_sequence_starts_correctly():
+    assert list(islice(recaman.sequence(), 10)) == [0, 1, 3, 6, 2, 7, 13, 20, 12, 21]
+
+
+def test_compact_sequence_matches(expected):
+    assert list(islice(recaman.sequence_compact(), TERMS)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_chunks_match(expected, chunk_size):
+    terms = array("Q")
+    for chunk in recaman.sequence_chunks(chunk_size):
+        assert len(chunk) == chunk_size
+        terms.extend(chunk)
+        if len(terms) >= TERMS:
+            break
+    assert terms[:TERMS].tolist() == expected
+
+
+@pytest.mark.parametrize("fmt", recaman.FORMATS)
+def test_write_and_read_sequence(tmp_path, expected, fmt):
+    filename = tmp_path / "sequence"
+    recaman.write_sequence(filename, 9999, fmt=fmt, chunk_size=999)
+    assert recaman.read_sequence(filename, fmt).tolist() == expected[:10000]
+
+
+def test_text_output_is_unchanged(tmp_path, expected):
+    filename = tmp_path / "sequence.txt"
+    recaman.write_sequence(filename, 1000)
+    assert filename.read_text() == "".join(f"{r}\n" for r in expected[:1001])
+
+
+@pytest.mark.parametrize("path", [str, pathlib.Path])
+@pytest.mark.parametrize("fmt", recaman.FORMATS)
+def test_interrupted_write_resumes(tmp_path, monkeypatch, expected, fmt, path):
+    filename = path(tmp_path / "sequence")
+    checkpoint = path(tmp_path / "checkpoint")
+    advance = recaman.RecamanState.advance
+    calls = 0
+
+    def failing_advance(self, count):
+        nonlocal calls
+        calls += 1
+        if calls == 8:
+            raise KeyboardInterrupt
+        return advance(self, count)
+
+    monkeypatch.setattr(recaman.RecamanState, "advance", failing_advance)
+    with pytest.raises(KeyboardInterrupt):
+        recaman.write_sequence(
+            filename, 9999, fmt, checkpoint, checkpoint_every=2500, chunk_size=1000
+        )
+    assert os.path.exists(checkpoint)
+
+    monkeypatch.setattr(recaman.RecamanState, "advance", advance)
+    recaman.write_sequence(
+        filename, 9999, fmt, checkpoint, checkpoint_every=2500, chunk_size=1000
+    )
+    assert not os.path.exists(checkpoint)
+    assert recaman.read_sequence(filename, fmt).tolist() == expected[:10000]
+
+
+def test_checkpoint_format_must_match(tmp_path):
+    filename = str(tmp_path / "sequence")
+    checkpoint = str(tmp_path / "checkpoint")
+    recaman._save_checkpoint(checkpoint, "u64", recaman.RecamanState(), 0, 0)
+    open(filename, "wb").close()
+    with pytest.raises(ValueError):
+        recaman.write_sequence(filename, 10, "text", checkpoint)
+
+
+def test_command_line(tmp_path, expected):
+    filename = tmp_path / "sequence"
+    recaman.main([str(filename), "99", "--format", "varint"])
+    assert recaman.read_sequence(filename, "varint").tolist() == expected[:100]
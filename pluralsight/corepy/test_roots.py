@@ -0,0 +1,75 @@
+import math
+import random
+from decimal import Context, Decimal
+
+import pytest
+
+import roots
+
+
+def test_isqrt_is_exact():
+    random.seed(0)
+    numbers = list(range(2000)) + [
+        random.getrandbits(bits) for bits in range(1, 5000, 13)
+    ]
+    numbers += [(1 << 200) - 1, 1 << 200, 10**100]
+    for n in numbers:
+        assert roots.isqrt(n) == math.isqrt(n)
+
+
+def test_isqrt_rejects_negative_numbers():
+    with pytest.raises(ValueError):
+        roots.isqrt(-1)
+
+
+@pytest.mark.parametrize(
+    "x", ["2", "0.0004", "1e-7", "12345678901234567890123", "7e-401"]
+)
+@pytest.mark.parametrize("digits", [5, 50, 1000])
+def test_sqrt_decimal_is_correctly_rounded(x, digits):
+    expected = Decimal(x).sqrt(Context(prec=digits))
+    assert roots.sqrt_decimal(x, digits) == expected
+
+
+@pytest.mark.parametrize("digits", [1, 2, 4, 7, 28])
+def test_sqrt_decimal_matches_decimal_sqrt(digits):
+    rng = random.Random(digits)
+    context = Context(prec=digits)
+    for _ in range(3000):
+        x = Decimal(rng.randrange(1, 10**8)).scaleb(rng.randint(-20, 20))
+        assert roots.sqrt_decimal(x, digits) == x.sqrt(context), x
+
+
+def test_sqrt_decimal_special_values():
+    assert roots.sqrt_decimal(0) == 0
+    with pytest.raises(ValueError):
+        roots.sqrt_decimal("-0.5")
+
+
+def test_sqrt_array_matches_math_sqrt():
+    pytest.importorskip("numpy")
+    values = [0.0, 1.0, 2.0, 9.0, 1e-310, 1e-300, 0.5, 12345.678, 1e300]
+    result = roots.sqrt_array(values)
+    for value, root in zip(values, result):
+        assert root == pytest.approx(math.sqrt(value), rel=1e-15, abs=0)
+
+
+def test_sqrt_array_keeps_shape():
+    pytest.importorskip("numpy")
+    result = roots.sqrt_array([[4, 9], [16, 25]])
+    assert result.shape == (2, 2)
+    assert result.tolist() == [[2.0, 3.0], [4.0, 5.0]]
+
+
+def test_sqrt_array_special_values():
+    pytest.importorskip("numpy")
+    result = roots.sqrt_array([math.inf, math.nan, 0.0])
+    assert result[0] == math.inf
+    assert math.isnan(result[1])
+    assert result[2] == 0.0
+
+
+def test_sqrt_array_rejects_negative_values():
+    pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        roots.sqrt_array([1.0, -1.0])
@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+import series
+
+
+@pytest.fixture
+def values():
+    "Provides some random 64-bit integers"
+    rng = random.Random(0)
+    return [rng.randint(-(2**63), 2**63 - 1) for _ in range(5000)]
+
+
+@pytest.fixture
+def series_file(tmp_path, values, monkeypatch):
+    "Provides a series file of values, parsed in many small blocks"
+    monkeypatch.setattr(series, "_BLOCK_SIZE", 1000)
+    filename = tmp_path / "series.txt"
+    filename.write_text("".join(f"{value}\n" for value in values))
+    return filename
+
+
+def test_read_series_array(series_file, values):
+    assert series.read_series_array(series_file).tolist() == values
+    assert series.read_series(series_file) == values
+
+
+def test_read_series_array_without_numpy(series_file, values, monkeypatch):
+    monkeypatch.setattr(series, "np", None)
+    assert series.read_series_array(series_file).tolist() == values
+
+
+def test_read_series_array_without_final_newline(tmp_path):
+    filename = tmp_path / "series.txt"
+    filename.write_text("1\n-2\n 3 \r\n4")
+    assert series.read_series_array(filename).tolist() == [1, -2, 3, 4]
+
+
+def test_read_series_array_empty_file(tmp_path):
+    filename = tmp_path / "series.txt"
+    filename.write_text("")
+    assert len(series.read_series_array(filename)) == 0
+    assert series.summarize_series(filename) == (0, None, None, 0)
+
+
+def test_sidecar_cache(series_file, values, monkeypatch):
+    assert series.read_series_array(series_file, cache=True).tolist() == values
+
+    def no_parsing(filename):
+        raise AssertionError("File was parsed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(series, "_parse_blocks", no_parsing)
+        assert series.read_series_array(series_file, cache=True).tolist() == values
+
+    series_file.write_text("1\n2\n")
+    assert series.read_series_array(series_file, cache=True).tolist() == [1, 2]
+
+
+def test_iter_series(series_file, values):
+    chunks = list(series.iter_series(series_file, chunk_size=700))
+    assert [len(chunk) for chunk in chunks] == [700] * 7 + [100]
+    assert [value for chunk in chunks for value in chunk] == values
+
+
+def test_summarize_series(series_file, values):
+    assert series.summarize_series(series_file) == (
+        len(values),
+        min(values),
+        max(values),
+        sum(values),
+    )
+
+
+def test_bad_line_is_reported_with_its_number(series_file):
+    with series_file.open("a") as f:
+        f.write("12\nabc\n")
+    with pytest.raises(ValueError, match=r"line 5002: invalid literal .* 'abc'"):
+        series.read_series_array(series_file)
+
+
+@pytest.mark.parametrize(
+    "text, line",
+    [
+        ("1\n\n3\n", 2),
+        ("\n1\n", 1),
+        ("1\n-\n3\n", 2),
+        ("1\n2-\n", 2),
+        ("1-2\n", 1),
+        ("7\n-", 2),
+        ("1\n1.5\n", 2),
+    ],
+)
+def test_malformed_lines_are_rejected(tmp_path, text, line):
+    filename = tmp_path / "series.txt"
+    filename.write_text(text)
+    with pytest.raises(ValueError, match=f"line {line}: invalid literal"):
+        series.read_series_array(filename)
+
+
+def test_values_must_fit_in_64_bits(tmp_path):
+    filename = tmp_path / "series.txt"
+    filename.write_text(f"{2**63 - 1}\n{-(2**63)}\n")
+    assert series.read_series_array(filename).tolist() == [2**63 - 1, -(2**63)]
+    filename.write_text(f"{2**63}\n")
+    with pytest.raises(OverflowError):
+        series.read_series_array(filename)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_read_series_parallel(series_file, values, workers):
+    assert series.read_series_parallel(series_file, workers).tolist() == values
+
+
+def test_read_series_parallel_reports_absolute_line_numbers(series_file):
+    with series_file.open("a") as f:
+        f.write("12\nabc\n13\n\n")
+    with pytest.raises(ValueError, match=r"line 5002: invalid literal .* 'abc'"):
+        series.read_series_parallel(series_file, 3)
+
+
+def test_read_series_parallel_small_files(tmp_path):
+    filename = tmp_path / "series.txt"
+    filename.write_text("")
+    assert len(series.read_series_parallel(filename, 2)) == 0
+    filename.write_text("5")
+    assert series.read_series_parallel(filename, 2).tolist() == [5]
+
+
+def test_read_series_parallel_densest_file(tmp_path):
+    filename = tmp_path / "series.txt"
+    filename.write_text("7\n" * 999 + "7")
+    assert series.read_series_parallel(filename, 3).tolist() == [7] * 1000
+
+
+def test_read_series_parallel_result_owns_its_values(series_file, values, tmp_path):
+    directory = tmp_path / "values"
+    directory.mkdir()
+    with series.read_series_parallel(series_file, 2, directory) as result:
+        assert result.format == "q"
+        assert result.tolist() == values
+        assert not any(directory.iterdir())  # Only the mapping holds them
+    with pytest.raises(ValueError):
+        result.tolist()  # Released
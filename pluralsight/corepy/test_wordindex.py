@@ -0,0 +1,110 @@
+import collections
+import os
+import random
+
+import pytest
+
+import wordindex
+
+
+@pytest.fixture
+def stream():
+    "A reproducible stream of words with a skewed distribution"
+    rng = random.Random(17)
+    vocabulary = [f"word{i}" for i in range(300)] + ["héllo", "hélium", "日本語"]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return rng.choices(vocabulary, weights, k=5000)
+
+
+@pytest.mark.parametrize("max_postings", [1_000_000, 333, 1])
+def test_build_index_matches_counter(tmp_path, stream, max_postings):
+    counts = collections.Counter(stream)
+    with wordindex.build_index(stream, tmp_path, max_postings) as index:
+        assert len(index) == len(counts)
+        assert index.total() == len(stream)
+        for word, count in counts.items():
+            assert index.count(word) == count
+        assert index.top(5) == sorted(counts.items(), key=lambda t: (-t[1], t[0]))[:5]
+    assert sorted(os.listdir(tmp_path)) == ["entries.u64", "postings.u64", "words.txt"]
+
+
+def test_positions(tmp_path, stream):
+    expected = collections.defaultdict(list)
+    for position, word in enumerate(stream):
+        expected[word].append(position)
+    with wordindex.build_index(stream, tmp_path, max_postings=100) as index:
+        for word, positions in expected.items():
+            view = index.positions(word)
+            assert view.tolist() == positions
+            view.release()
+
+
+def test_prefix(tmp_path):
+    with wordindex.build_index(
+        "help hélium héllo hé he hélium".split(), tmp_path
+    ) as index:
+        assert index.prefix("hé") == [("hé", 1), ("hélium", 2), ("héllo", 1)]
+        assert index.prefix("x") == []
+        assert len(index.prefix("")) == len(index)
+
+
+def test_missing_word(tmp_path):
+    with wordindex.build_index(["a", "b"], tmp_path) as index:
+        assert "c" not in index
+        assert "a" in index
+        assert index.count("c") == 0
+        assert len(index.positions("c")) == 0
+
+
+def test_empty_index(tmp_path):
+    with wordindex.build_index([], tmp_path) as index:
+        assert len(index) == 0
+        assert index.total() == 0
+        assert index.top(3) == []
+        assert index.count("a") == 0
+
+
+def test_incremental_add(tmp_path, stream):
+    builder = wordindex.IndexBuilder(tmp_path, max_postings=500)
+    for start in range(0, len(stream), 700):
+        builder.add(stream[start : start + 700])
+    with builder.finish() as index:
+        assert index.total() == len(stream)
+        assert index.count(stream[0]) == stream.count(stream[0])
+
+
+def test_reopen(tmp_path, stream):
+    wordindex.build_index(stream, tmp_path).close()
+    with wordindex.WordIndex(tmp_path) as index:
+        assert index.total() == len(stream)
+
+
+@pytest.mark.parametrize("max_fan_in", [2, 3, 64])
+def test_merge_with_bounded_fan_in(tmp_path, stream, max_fan_in):
+    counts = collections.Counter(stream)
+    with wordindex.build_index(stream, tmp_path, 50, max_fan_in) as index:
+        assert index.total() == len(stream)
+        for word, count in counts.items():
+            assert index.count(word) == count
+        positions = index.positions(stream[-1])
+        assert positions[-1] == len(stream) - 1
+        assert list(positions) == sorted(positions)
+        positions.release()
+    assert sorted(os.listdir(tmp_path)) == ["entries.u64", "postings.u64", "words.txt"]
+
+
+def test_many_runs_under_file_limit(tmp_path, stream):
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, hard), hard))
+    try:
+        index = wordindex.build_index(stream, tmp_path, max_postings=2)
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    with index:
+        assert index.total() == len(stream)
+
+
+def test_invalid_fan_in(tmp_path):
+    with pytest.raises(ValueError):
+        wordindex.IndexBuilder(tmp_path, max_fan_in=1)
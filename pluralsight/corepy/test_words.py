@@ -0,0 +1,133 @@
+import contextlib
+import functools
+import io
+import subprocess
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+import words
+
+TEXT = (
+    "It was the best of times,\nit was the worst of times  héllo wörld 日本語 ümlaut\n"
+)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    "Serves files without logging each request"
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    "Serves a directory over HTTP on localhost and provides it and its base URL"
+    tmp_path = tmp_path_factory.mktemp("documents")
+    handler = functools.partial(QuietHandler, directory=str(tmp_path))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def documents(server):
+    "Provides URLs of documents and their expected words"
+    directory, base_url = server
+    urls, expected = [], []
+    for i in range(6):
+        text = TEXT * (i + 1) + f"document{i}"
+        (directory / f"{i}.txt").write_text(text, encoding="utf-8")
+        urls.append(f"{base_url}/{i}.txt")
+        expected.extend(text.split())
+    return urls, expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 65536])
+def test_iter_words_matches_fetch_words(documents, chunk_size):
+    urls, expected = documents
+    assert list(words.iter_words(urls[:1], chunk_size=chunk_size)) == words.fetch_words(
+        urls[0]
+    )
+    assert (
+        list(words.iter_words(urls, max_workers=3, chunk_size=chunk_size)) == expected
+    )
+
+
+def test_iter_words_is_lazy(documents):
+    urls, expected = documents
+    stream = words.iter_words(urls, max_workers=2, chunk_size=5, prefetch=1)
+    assert next(stream) == expected[0]
+    stream.close()
+
+
+def test_iter_words_raises_fetch_errors(documents, server):
+    urls, _ = documents
+    with pytest.raises(HTTPError):
+        list(words.iter_words(urls + [f"{server[1]}/missing.txt"]))
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 8192])
+def test_write_items_matches_print_items(capsys, batch_size):
+    items = ["héllo", 42, "wörld", None] * 5
+    words.print_items(items)
+    expected = capsys.readouterr().out.encode("utf-8")
+    output = io.BytesIO()
+    assert words.write_items(items, output, batch_size) == (20, len(expected))
+    assert output.getvalue() == expected
+
+
+def test_write_items_uses_stdout_encoding(monkeypatch):
+    items = ["héllo", "日本語", 42]
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="latin-1", errors="replace")
+    monkeypatch.setattr(sys, "stdout", stdout)
+    words.print_items(items)
+    stdout.flush()
+    expected = stdout.buffer.getvalue()
+    assert expected == "héllo\n???\n42\n".encode("latin-1")
+    stdout.buffer.truncate(0)
+    stdout.buffer.seek(0)
+    assert words.write_items(items) == (3, len(expected))
+    assert stdout.buffer.getvalue() == expected
+
+
+def test_write_items_to_text_only_stdout(documents):
+    urls, expected = documents
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+        assert words.write_items(["héllo", 42]) == (2, 9)
+    assert stdout.getvalue() == "héllo\n42\n"
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+        words.main(*urls)
+    assert stdout.getvalue().split() == expected
+
+
+def test_write_items_empty():
+    output = io.BytesIO()
+    assert words.write_items([], output) == (0, 0)
+    assert output.getvalue() == b""
+
+
+def test_main_writes_to_a_file(documents, tmp_path):
+    urls, expected = documents
+    output = tmp_path / "words.txt"
+    words.main(*urls, output=output)
+    assert output.read_text(encoding="utf-8").split("\n")[:-1] == expected
+
+
+def test_command_line(documents):
+    urls, expected = documents
+    result = subprocess.run(
+        [sys.executable, words.__file__, *urls[:2], "--stats"],
+        capture_output=True,
+        check=True,
+    )
+    assert (
+        result.stdout.decode("utf-8").split() == expected[: len(TEXT.split()) * 3 + 2]
+    )
+    assert b"words/s" in result.stderr
@@ -0,0 +1,315 @@
+"""An on-disk inverted index of word positions, built from a word stream.
+
+Usage:
+
+    python3 wordindex.py <DIRECTORY> <URL> [<URL> ...]
+"""
+
+import bisect
+import functools
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import groupby
+
+import words
+
+_WORDS_FILE = "words.txt"
+_ENTRIES_FILE = "entries.u64"
+_POSTINGS_FILE = "postings.u64"
+
+# Spilled run records: word length in bytes, number of positions
+_RUN_RECORD = struct.Struct("=IQ")
+
+
+class IndexBuilder:
+    """Builds a WordIndex from a stream of words in bounded memory.
+
+    Word positions are collected in memory until max_postings of them
+    are held, then written out as a sorted run file. finish() merges
+    the runs into the final index, holding only one word's positions
+    from each run at a time. Runs are merged at most max_fan_in at a
+    time, through intermediate runs if there are more, so that the
+    number of open files stays bounded.
+
+    Args:
+        directory: The directory to write the index to. It is created
+            if necessary.
+        max_postings: The number of positions held in memory before
+            they are spilled to disk.
+        max_fan_in: The most run files merged, and open, at once.
+    """
+
+    def __init__(self, directory, max_postings=1_000_000, max_fan_in=64):
+        if max_fan_in < 2:
+            raise ValueError(f"Max fan in {max_fan_in} is less than 2")
+        self._directory = os.fspath(directory)
+        self._max_postings = max_postings
+        self._max_fan_in = max_fan_in
+        self._postings = {}
+        self._held = 0
+        self._position = 0
+        self._runs = []
+        self._runs_written = 0
+        os.makedirs(self._directory, exist_ok=True)
+
+    def add(self, words):
+        """Add words to the index, at the positions following the last.
+
+        Args:
+            words: An iterable series of words, none containing a newline.
+        """
+        postings = self._postings
+        for word in words:
+            positions = postings.get(word)
+            if positions is None:
+                positions = postings[word] = array("Q")
+            positions.append(self._position)
+            self._position += 1
+            self._held += 1
+            if self._held >= self._max_postings:
+                self._spill()
+                postings = self._postings
+
+    def finish(self):
+        """Write the index files and open the index.
+
+        Returns:
+            The WordIndex.
+        """
+        if self._runs:
+            self._spill()
+            while len(self._runs) > self._max_fan_in:
+                self._merge_pass()
+            groups = _merge_runs(self._runs)
+        else:
+            groups = ((word, [self._postings[word]]) for word in sorted(self._postings))
+        try:
+            _write_index(self._directory, groups)
+        finally:
+            for run in self._runs:
+                os.remove(run)
+            self._runs = []
+            self._postings = {}
+            self._held = 0
+        return WordIndex(self._directory)
+
+    def _merge_pass(self):
+        """Merge each max_fan_in consecutive runs into one.
+
+        Merging only consecutive runs keeps each run covering one range
+        of positions, so runs merge in position order.
+        """
+        runs, self._runs = self._runs, []
+        for start in range(0, len(runs), self._max_fan_in):
+            batch = runs[start : start + self._max_fan_in]
+            if len(batch) == 1:
+                self._runs.append(batch[0])
+                continue
+            self._write_run(_merge_runs(batch))
+            for run in batch:
+                os.remove(run)
+
+    def _spill(self):
+        """Write the postings held in memory to a sorted run file."""
+        postings = self._postings
+        self._write_run((word, [postings[word]]) for word in sorted(postings))
+        self._postings = {}
+        self._held = 0
+
+    def _write_run(self, groups):
+        """Write (word, [positions, ...]) groups in word order to a run file."""
+        run = os.path.join(self._directory, f"run{self._runs_written}.tmp")
+        with open(run, "wb") as f:
+            for word, position_arrays in groups:
+                encoded = word.encode("utf-8")
+                count = sum(len(positions) for positions in position_arrays)
+                f.write(_RUN_RECORD.pack(len(encoded), count))
+                f.write(encoded)
+                for positions in position_arrays:
+                    positions.tofile(f)
+        self._runs.append(run)
+        self._runs_written += 1
+
+
+def build_index(words, directory, max_postings=1_000_000, max_fan_in=64):
+    """Build a WordIndex from a stream of words.
+
+    Args:
+        words: An iterable series of words.
+        directory: The directory to write the index to.
+        max_postings: The number of positions held in memory before
+            they are spilled to disk.
+        max_fan_in: The most run files merged, and open, at once.
+
+    Returns:
+        The WordIndex.
+    """
+    builder = IndexBuilder(directory, max_postings, max_fan_in)
+    builder.add(words)
+    return builder.finish()
+
+
+class WordIndex:
+    """A memory-mapped inverted index of word positions.
+
+    The vocabulary is loaded into a sorted list, while the counts and
+    positions stay on disk and are paged in as they are looked at.
+    Files use the native byte order.
+
+    Use as a context manager, or call close() when done. Position
+    views obtained from the index must be released before closing.
+    """
+
+    def __init__(self, directory):
+        directory = os.fspath(directory)
+        with open(os.path.join(directory, _WORDS_FILE), encoding="utf-8") as f:
+            self._words = f.read().split("\n")[:-1]
+        self._maps = []
+        # Pairs of (offset, count) in the postings file for each word
+        self._entries = self._map(os.path.join(directory, _ENTRIES_FILE))
+        self._postings = self._map(os.path.join(directory, _POSTINGS_FILE))
+        self._counts = self._entries[1::2]
+
+    def _map(self, filename):
+        with open(filename, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return memoryview(array("Q"))
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(data)
+        return memoryview(data).cast("Q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._counts.release()
+        self._entries.release()
+        self._postings.release()
+        for data in self._maps:
+            data.close()
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def total(self):
+        """The number of words indexed."""
+        return len(self._postings)
+
+    def count(self, word):
+        """The number of times a word occurs."""
+        index = self._find(word)
+        return 0 if index is None else self._counts[index]
+
+    def positions(self, word):
+        """The positions at which a word occurs, in increasing order.
+
+        Returns:
+            A zero-copy memoryview of unsigned 64-bit integers.
+        """
+        index = self._find(word)
+        if index is None:
+            return self._postings[0:0]
+        offset = self._entries[2 * index]
+        return self._postings[offset : offset + self._counts[index]]
+
+    def top(self, k):
+        """The k most frequent words.
+
+        Returns:
+            A list of (word, count) tuples, most frequent first, with
+            ties in alphabetical order.
+        """
+        best = heapq.nsmallest(
+            k, range(len(self._words)), key=lambda index: -self._counts[index]
+        )
+        return [(self._words[index], self._counts[index]) for index in best]
+
+    def prefix(self, prefix):
+        """The words which start with a prefix.
+
+        Returns:
+            A list of (word, count) tuples in alphabetical order.
+        """
+        start = bisect.bisect_left(self._words, prefix)
+        matches = []
+        for index in range(start, len(self._words)):
+            word = self._words[index]
+            if not word.startswith(prefix):
+                break
+            matches.append((word, self._counts[index]))
+        return matches
+
+    def _find(self, word):
+        index = bisect.bisect_left(self._words, word)
+        if index < len(self._words) and self._words[index] == word:
+            return index
+        return None
+
+
+def _merge_runs(runs):
+    """Merge run files into (word, [positions, ...]) groups in word order."""
+    entries = heapq.merge(*[_read_run(run) for run in runs])
+    return (
+        (word, [positions for _, _, positions in group])
+        for word, group in groupby(entries, key=lambda entry: entry[0])
+    )
+
+
+def _read_run(filename):
+    """Read a spilled run file.
+
+    Yields:
+        (word, run position, positions) tuples in word order, where the
+        run position keeps merged positions in increasing order.
+    """
+    with open(filename, "rb") as f:
+        while header := f.read(_RUN_RECORD.size):
+            length, count = _RUN_RECORD.unpack(header)
+            word = f.read(length).decode("utf-8")
+            positions = array("Q")
+            positions.fromfile(f, count)
+            yield word, positions[0], positions
+
+
+def _write_index(directory, groups):
+    """Write the index files from (word, [positions, ...]) groups in word order."""
+    offset = 0
+    path = functools.partial(os.path.join, directory)
+    with open(path(_WORDS_FILE), "w", encoding="utf-8") as words_file, open(
+        path(_ENTRIES_FILE), "wb"
+    ) as entries_file, open(path(_POSTINGS_FILE), "wb") as postings_file:
+        for word, position_arrays in groups:
+            count = 0
+            for positions in position_arrays:
+                positions.tofile(postings_file)
+                count += len(positions)
+            words_file.write(word + "\n")
+            array("Q", (offset, count)).tofile(entries_file)
+            offset += count
+
+
+def main(directory, *urls):
+    """Index the words from text documents and print the most common.
+
+    Args:
+        directory: The directory to write the index to.
+        urls: The URLs of UTF-8 text documents.
+    """
+    with build_index(words.iter_words(urls), directory) as index:
+        print(f"{index.total()} words, {len(index)} distinct")
+        for word, count in index.top(10):
+            print(f"{count:>10} {word}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -3,12 +3,22 @@
 
 Usage:
 
-    python3 words.py <URL>
+    python3 words.py <URL> [<URL> ...] [--output FILE] [--stats]
 """
 
+import argparse
+import codecs
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from urllib.request import urlopen
 
+# Marks the end of the words from one URL
+_DONE = object()
+
 
 def fetch_words(url):
     """Fetch a list of words from a URL.
@@ -30,6 +40,87 @@ def fetch_words(url):
     return story_words
 
 
+def iter_words(urls, max_workers=8, chunk_size=65536, prefetch=16):
+    """Fetch words from many URLs concurrently, yielding them lazily.
+
+        Documents are downloaded by a bounded pool of threads and
+        decoded incrementally, so UTF-8 characters and words split
+        across chunks are handled correctly. Words are yielded in
+        document order, URL by URL. Each download runs at most
+        prefetch chunks ahead of the consumer, and closing the
+        generator stops all downloads.
+
+        Args:
+            urls: An iterable series of URLs of UTF-8 text documents.
+            max_workers: The maximum number of concurrent downloads.
+            chunk_size: The number of bytes read at a time.
+            prefetch: The number of chunks of words buffered per URL.
+
+        Yields:
+            The words of each document as strings.
+
+        Raises:
+            OSError: If a document could not be fetched.
+    """
+    stop = threading.Event()
+    queues = []
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for url in urls:
+            queues.append(queue.Queue(maxsize=prefetch))
+            pool.submit(_fetch_into, url, queues[-1], stop, chunk_size)
+        for words in queues:
+            while (item := words.get()) is not _DONE:
+                if isinstance(item, BaseException):
+                    raise item
+                yield from item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _fetch_into(url, words, stop, chunk_size):
+    """Worker task: put batches of words from a URL on a queue."""
+    if stop.is_set():
+        return
+    try:
+        for batch in _iter_word_batches(url, chunk_size):
+            if not _put(words, batch, stop):
+                return
+    except Exception as error:
+        _put(words, error, stop)
+    else:
+        _put(words, _DONE, stop)
+
+
+def _put(words, item, stop):
+    """Put an item on a bounded queue unless stopped while waiting."""
+    while not stop.is_set():
+        try:
+            words.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _iter_word_batches(url, chunk_size):
+    """Fetch a document chunk by chunk, yielding lists of its words."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    partial = ""
+    with urlopen(url) as story:
+        while chunk := story.read(chunk_size):
+            text = partial + decoder.decode(chunk)
+            batch = text.split()
+            # The last word may continue in the next chunk
+            partial = batch.pop() if batch and not text[-1].isspace() else ""
+            if batch:
+                yield batch
+        batch = (partial + decoder.decode(b"", final=True)).split()
+        if batch:
+            yield batch
+
+
 def print_items(items):
     """Print items one per line.
 
@@ -40,15 +131,80 @@ def print_items(items):
         print(item)
 
 
-def main(url):
-    """Print each word from a text document from a url.
+def write_items(items, output=None, batch_size=8192):
+    """Write items one per line in large buffered batches.
+
+        Produces the same text as print_items(), but joins a batch
+        of items into one encoded buffer at a time and writes it
+        straight to a binary stream, avoiding the per-item cost of
+        print().
 
         Args:
-            url: The URL of a UTF-8 text document.
+            items: An iterable series of printable items.
+            output: A binary file object to write UTF-8 to. Defaults
+                to the standard output, in its own encoding and with
+                its own error handler, or as text if it has no binary
+                buffer, as in IDLE or under redirect_stdout().
+            batch_size: The number of items joined into each write.
+
+        Returns:
+            A tuple of the number of items and bytes written, or
+            characters written to a text standard output.
     """
-    words = fetch_words(url)
-    print_items(words)
+    encoding, errors = "utf-8", "strict"
+    if output is None:
+        sys.stdout.flush()
+        output = getattr(sys.stdout, "buffer", None)
+        if output is None:
+            output, encoding = sys.stdout, None
+        else:
+            encoding, errors = sys.stdout.encoding, sys.stdout.errors
+    items = iter(items)
+    count = size = 0
+    while batch := list(islice(items, batch_size)):
+        data = "\n".join(map(str, batch)) + "\n"
+        if encoding is not None:
+            data = data.encode(encoding, errors)
+        output.write(data)
+        count += len(batch)
+        size += len(data)
+    output.flush()
+    return count, size
+
+
+def main(*urls, output=None, stats=False):
+    """Print each word from text documents from urls.
+
+        Args:
+            urls: The URLs of UTF-8 text documents.
+            output: An optional filename to write to instead of the
+                standard output.
+            stats: If True, report throughput on standard error.
+    """
+    start = time.perf_counter()
+    words = iter_words(urls)
+    if output is None:
+        count, size = write_items(words)
+    else:
+        with open(output, "wb") as f:
+            count, size = write_items(words, f)
+    if stats:
+        elapsed = time.perf_counter() - start
+        print(
+            f"{count} words, {size} bytes in {elapsed:.3f}s "
+            f"({count / elapsed:,.0f} words/s, {size / elapsed / 1e6:.1f} MB/s)",
+            file=sys.stderr,
+        )
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Print the words from URLs.")
+    parser.add_argument("urls", nargs="+", metavar="URL")
+    parser.add_argument("-o", "--output", help="write to a file instead of stdout")
+    parser.add_argument("--stats", action="store_true", help="report throughput")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main(sys.argv[1])  # The 0th arg is the module filename.
+    args = _parse_args(sys.argv[1:])  # The 0th arg is the module filename.
+    main(*args.urls, output=args.output, stats=args.stats)